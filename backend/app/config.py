@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -10,6 +11,37 @@ class Settings(BaseSettings):
     json_data_dir: str = "/home/ajbir/task-planner-app/data"
     cors_origins: str = "http://localhost:5173,http://localhost:3000"
 
+    # Anthropic API client (one shared, pooled client per process)
+    anthropic_timeout_seconds: float = 60.0
+    anthropic_connect_timeout_seconds: float = 5.0
+    anthropic_max_retries: int = 2
+    anthropic_max_connections: int = 20
+    # Point at a local stand-in (mock_anthropic_server.py) to load test without model calls
+    anthropic_base_url: Optional[str] = None
+
+    # Concurrency gate in front of Anthropic calls (chat is admitted ahead of AI search)
+    claude_max_concurrent_requests: int = 4
+    claude_max_queued_requests: int = 16
+    claude_request_deadline_seconds: float = 90.0  # Queue wait plus the call itself
+
+    # AI search context: records retrieved per category and prompt size limit
+    ai_context_top_k: int = 20
+    ai_context_token_budget: int = 4000
+
+    # Cache of Claude answers keyed by prompt and context (0 seconds disables it)
+    claude_cache_ttl_seconds: float = 300.0
+    claude_cache_max_size: int = 128
+    claude_cache_chat: bool = False  # Also cache /chat replies to identical messages
+
+    # Size limit for the household profile (team + knowledge base JSON files) sent ahead of every prompt
+    claude_profile_token_budget: int = 3000
+
+    # Chat memory in JSON storage: messages kept, recent turns sent with each
+    # message, and the length of the summary that replaces older turns
+    chat_history_max_messages: int = 200
+    chat_history_token_budget: int = 2000
+    chat_summary_max_tokens: int = 300
+
     class Config:
         env_file = ".env"
 
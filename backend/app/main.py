@@ -1,15 +1,27 @@
-from fastapi import FastAPI
+import math
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 
 from app.config import get_settings
 from app.database import Base, SessionLocal, engine
 from app.seed import ensure_default_access_codes
+from app.services.claude_service import claude_gate, close_client, get_response_cache_stats, get_usage_stats
+from app.services.facet_index import facet_index
+from app.services.request_gate import GateRejected
+from app.services.search_index import search_index
+from app.services.sheets_service import sheets_service
+from app.services.suggest_index import suggest_index
+from app.services.vector_index import vector_index
 from app.routers import (
     admin,
     auth,
     auth_json,
     calendar_json,
-    chat,
+    chat_json,
     documents_json,
     feedback_json,
     knowledge_json,
@@ -21,7 +33,7 @@ from app.routers import (
 )
 
 # Optional database-backed routers (used when JSON storage disabled)
-from app.routers import calendar, documents, knowledge, reminders, search, tasks
+from app.routers import calendar, chat, documents, knowledge, reminders, search, tasks
 
 settings = get_settings()
 
@@ -37,12 +49,53 @@ except Exception as e:
         raise
     print("Continuing with JSON storage mode...")
 
+
+def _warm_up_search():
+    """Load search indexes (from disk when fresh) so the first search doesn't pay for it"""
+    search_index.warm_up()
+    suggest_index.build()
+    facet_index.build()
+    vector_index.build()
+
+
+def _index_sheet_tasks(tasks):
+    """Search Google Sheet tasks alongside JSON tasks, from the locally held copy"""
+    search_index.set_source("tasks", "google_sheets", tasks)
+    vector_index.set_source("tasks", "google_sheets", tasks)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.use_json_storage:
+        threading.Thread(target=_warm_up_search, name="search-warm-up", daemon=True).start()
+    if sheets_service is not None:
+        sheets_service.add_listener(_index_sheet_tasks)
+        sheets_service.start_background_refresh()
+    yield
+    if sheets_service is not None:
+        sheets_service.stop_background_refresh()
+    # Persist any index changes still waiting on the background writer
+    search_index.flush()
+    await close_client()
+
+
 app = FastAPI(
     title="Task Planner API",
     description="A comprehensive task planning, calendar, and knowledge management system",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+@app.exception_handler(GateRejected)
+async def gate_rejected_handler(request: Request, exc: GateRejected):
+    """AI request not admitted by the concurrency gate - tell the client when to retry"""
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
 # Configure CORS
 origins = [o.strip() for o in settings.cors_origins.split(",") if o.strip()]
 app.add_middleware(
@@ -51,6 +104,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # Include authentication first (use JSON-based auth when using JSON storage)
@@ -68,6 +122,7 @@ if settings.use_json_storage:
     app.include_router(search_json.router)
     app.include_router(team.router)
     app.include_router(feedback_json.router)
+    app.include_router(chat_json.router)
 else:
     app.include_router(tasks.router)
     app.include_router(calendar.router)
@@ -76,8 +131,8 @@ else:
     app.include_router(documents.router)
     app.include_router(search.router)
     app.include_router(feedback_json.router)
+    app.include_router(chat.router)
 
-app.include_router(chat.router)
 app.include_router(admin.router)
 app.include_router(task_templates.router)
 
@@ -94,3 +149,21 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/health/sheets")
+def sheets_health_check():
+    """Google Sheets circuit breaker state and read statistics"""
+    if sheets_service is None:
+        return {"available": False, "status": "unconfigured"}
+    return sheets_service.get_health()
+
+
+@app.get("/health/claude")
+def claude_health_check():
+    """Claude token usage (including prompt cache reads/writes), response cache and concurrency gate statistics"""
+    return {
+        "usage": get_usage_stats(),
+        "response_cache": get_response_cache_stats(),
+        "concurrency": claude_gate.get_stats(),
+    }
@@ -7,6 +7,7 @@ from app import models, schemas
 from app.database import get_db
 from app.models import AccessRole
 from app.security import require_role, hash_code
+from app.services.access_code_index import access_code_index
 from app.services.json_storage import json_storage
 
 
@@ -112,16 +113,14 @@ def create_access_code(code_data: Dict[str, Any]) -> Dict[str, Any]:
     if code_data["role"] not in ["admin", "member"]:
         raise HTTPException(status_code=400, detail="Role must be 'admin' or 'member'")
 
-    # Check if code already exists
-    existing_codes = json_storage.get_all("access_codes")
-    for existing in existing_codes:
-        if existing.get("code_hash") == hash_code(code_data["code"]):
-            raise HTTPException(status_code=400, detail="Access code already exists")
+    # Check if code already exists (active or not)
+    code_hash = hash_code(code_data["code"])
+    if access_code_index.find(code_hash, active_only=False):
+        raise HTTPException(status_code=400, detail="Access code already exists")
 
-    # Create new access code entry
+    # Create new access code entry (id is assigned by json_storage)
     new_code = {
-        "id": max([c.get("id", 0) for c in existing_codes], default=0) + 1,
-        "code_hash": hash_code(code_data["code"]),
+        "code_hash": code_hash,
         "label": code_data["label"],
         "role": code_data["role"],
         "is_active": code_data.get("is_active", True),
@@ -146,14 +145,7 @@ def create_access_code(code_data: Dict[str, Any]) -> Dict[str, Any]:
 def update_access_code(code_id: int, code_data: Dict[str, Any]) -> Dict[str, Any]:
     """Update an access code (admin only)"""
     # Get existing code
-    existing_codes = json_storage.get_all("access_codes")
-    code_to_update = None
-    for code in existing_codes:
-        if code.get("id") == code_id:
-            code_to_update = code
-            break
-
-    if not code_to_update:
+    if not access_code_index.get(code_id):
         raise HTTPException(status_code=404, detail="Access code not found")
 
     # Prepare update data (only allow certain fields to be updated)
@@ -188,10 +180,7 @@ def update_access_code(code_id: int, code_data: Dict[str, Any]) -> Dict[str, Any
 def delete_access_code(code_id: int) -> Dict[str, str]:
     """Delete an access code (admin only)"""
     # Check if code exists
-    existing_codes = json_storage.get_all("access_codes")
-    code_exists = any(code.get("id") == code_id for code in existing_codes)
-
-    if not code_exists:
+    if not access_code_index.get(code_id):
         raise HTTPException(status_code=404, detail="Access code not found")
 
     # Delete from storage
@@ -5,7 +5,8 @@ from fastapi import APIRouter, HTTPException, Request, status
 
 from app import schemas
 from app.models import AccessRole
-from app.security import create_access_token, verify_code, hash_code, get_current_user
+from app.security import create_access_token, hash_code, get_current_user
+from app.services.access_code_index import access_code_index
 from app.services.json_storage import json_storage
 from fastapi import Depends
 
@@ -54,15 +55,8 @@ def login(
     submitted_code = credentials.password.strip()
     client_ip: Optional[str] = request.client.host if request.client else None
 
-    # Get all active access codes from JSON storage
-    access_codes = json_storage.get_all("access_codes")
-    active_codes = [code for code in access_codes if code.get("is_active", True)]
-
-    matching_code = None
-    for access_code in active_codes:
-        if verify_code(submitted_code, access_code["code_hash"]):
-            matching_code = access_code
-            break
+    # Codes are stored hashed - hash once and look it up
+    matching_code = access_code_index.find(hash_code(submitted_code))
 
     # Log the login attempt
     attempt = {
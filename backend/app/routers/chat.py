@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List
 from app import models, schemas
-from app.database import get_db
-from app.services.claude_service import chat_with_claude
+from app.database import SessionLocal, get_db
+from app.services.claude_service import chat_with_claude, stream_chat_with_claude
+from app.services.request_gate import GateRejected
 from app.security import require_role
+from app.streaming import relay_reply
 from app.models import AccessRole
 
 router = APIRouter(
@@ -44,10 +48,40 @@ async def send_message(chat_request: schemas.ChatRequest, db: Session = Depends(
             response=response_text,
             created_at=assistant_message.created_at
         )
+    except GateRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _save_assistant_message(content: str) -> datetime:
+    # The request's session is closed once the streaming response starts
+    with SessionLocal() as db:
+        message = models.ChatHistory(role="assistant", content=content)
+        db.add(message)
+        db.commit()
+        return message.created_at
+
+
+@router.post("/stream")
+async def stream_message(chat_request: schemas.ChatRequest, request: Request, db: Session = Depends(get_db)):
+    """
+    Send a message to Claude and relay the reply as Server-Sent Events
+
+    Events: "delta" {"text"} for each chunk as it arrives, then "done"
+    {"created_at", "ttft_ms", "total_ms"} once the full reply is saved to
+    history, or "error" {"detail"}. Disconnecting stops generation; an
+    interrupted reply is not saved. Returns 429/503 without streaming when
+    the AI request queue is full or its wait times out.
+    """
+    user_message = models.ChatHistory(role="user", content=chat_request.message)
+    db.add(user_message)
+    db.commit()
+
+    stream = stream_chat_with_claude(message=chat_request.message, context=chat_request.context)
+    return await relay_reply(request, stream, _save_assistant_message)
+
+
 @router.get("/history", response_model=List[schemas.ChatMessage])
 def get_chat_history(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
     """Get chat history"""
@@ -0,0 +1,103 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from typing import List
+from app import schemas
+from app.config import get_settings
+from app.services.chat_memory import chat_memory
+from app.services.claude_service import chat_with_claude, stream_chat_with_claude
+from app.services.request_gate import GateRejected
+from app.security import get_current_user, require_role
+from app.streaming import relay_reply
+from app.models import AccessRole
+
+settings = get_settings()
+
+router = APIRouter(
+    prefix="/chat",
+    tags=["chat"],
+    dependencies=[Depends(require_role(AccessRole.MEMBER))],
+)
+
+
+@router.post("/", response_model=schemas.ChatResponse)
+async def send_message(
+    chat_request: schemas.ChatRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(get_current_user),
+):
+    """Send a message to Claude, with your recent conversation, and get a response"""
+    owner = current_user["label"]
+    memory = await run_in_threadpool(chat_memory.window, owner, settings.chat_history_token_budget)
+    try:
+        response_text = await chat_with_claude(
+            message=chat_request.message,
+            context=chat_request.context,
+            history=memory["history"],
+            summary=memory["summary"],
+        )
+    except GateRejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    # Message and reply are saved together
+    reply = await run_in_threadpool(chat_memory.add_exchange, owner, chat_request.message, response_text)
+    background_tasks.add_task(chat_memory.refresh_summary, owner, settings.chat_history_token_budget)
+
+    return schemas.ChatResponse(
+        response=response_text,
+        created_at=reply['created_at']
+    )
+
+
+@router.post("/stream")
+async def stream_message(
+    chat_request: schemas.ChatRequest,
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Send a message to Claude, with your recent conversation, and relay the
+    reply as Server-Sent Events
+
+    Events: "delta" {"text"} for each chunk as it arrives, then "done"
+    {"created_at", "ttft_ms", "total_ms"} once the exchange is saved to
+    history, or "error" {"detail"}. Disconnecting stops generation; an
+    interrupted exchange is not saved. Returns 429/503 without streaming when
+    the AI request queue is full or its wait times out.
+    """
+    owner = current_user["label"]
+    memory = await run_in_threadpool(chat_memory.window, owner, settings.chat_history_token_budget)
+
+    stream = stream_chat_with_claude(
+        message=chat_request.message,
+        context=chat_request.context,
+        history=memory["history"],
+        summary=memory["summary"],
+    )
+
+    def save(reply_text: str):
+        # Message and reply are saved together
+        return chat_memory.add_exchange(owner, chat_request.message, reply_text)['created_at']
+
+    return await relay_reply(
+        request, stream, save,
+        background=BackgroundTask(chat_memory.refresh_summary, owner, settings.chat_history_token_budget),
+    )
+
+
+@router.get("/history", response_model=List[schemas.ChatMessage])
+def get_chat_history(skip: int = 0, limit: int = 50, current_user: dict = Depends(get_current_user)):
+    """Get your chat history"""
+    return [
+        schemas.ChatMessage(role=msg['role'], content=msg['content'])
+        for msg in chat_memory.recent(current_user["label"], skip=skip, limit=limit)
+    ]
+
+
+@router.delete("/history", status_code=204)
+def clear_chat_history(current_user: dict = Depends(get_current_user)):
+    """Clear your chat history, including the conversation summary"""
+    chat_memory.clear(current_user["label"])
+    return None
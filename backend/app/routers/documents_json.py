@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
 from app import schemas
+from app.services.facet_index import facet_index, parse_tag_params
 from app.services.json_storage import json_storage
+from app.services.search_index import search_index
 from app.security import require_role
 from app.models import AccessRole
 
@@ -13,21 +15,56 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.Document])
-def get_documents(skip: int = 0, limit: int = 100, file_type: str = None):
+def get_documents(
+    skip: int = 0,
+    limit: int = 100,
+    file_type: str = None,
+    tags: Optional[List[str]] = Query(default=None),
+):
+    """Documents, optionally only those of a file type and having every given tag"""
     documents = json_storage.get_all("documents")
-    if file_type:
-        documents = [d for d in documents if d.get('file_type') == file_type]
+    tag_list = parse_tag_params(tags)
+    if file_type or tag_list:
+        ids = facet_index.filter_ids("documents", {"file_type": [file_type], "tags": tag_list})
+        documents = [d for d in documents if d.get('id') in ids]
     return documents[skip:skip + limit]
 
 
+@router.get("/tags")
+def get_document_tags():
+    """Every tag used by documents, with document counts"""
+    return [{"tag": v["value"], "count": v["count"]} for v in facet_index.counts("documents", "tags")]
+
+
 @router.get("/search/{search_term}", response_model=List[schemas.Document])
-def search_documents(search_term: str):
-    documents = json_storage.get_all("documents")
-    search_term_lower = search_term.lower()
-    results = [d for d in documents if
-               search_term_lower in d.get('title', '').lower() or
-               search_term_lower in d.get('description', '').lower()]
-    return results
+def search_documents(
+    search_term: str,
+    response: Response,
+    fuzzy: bool = True,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    tags: Optional[List[str]] = Query(default=None),
+):
+    """
+    Documents matching the search term, most relevant first
+    The total match count and next-page cursor are returned in the
+    X-Total-Count and X-Next-Cursor headers. tags (repeated or comma-separated)
+    limits results to documents having every tag.
+    """
+    tag_list = parse_tag_params(tags)
+    ids = facet_index.filter_ids("documents", {"tags": tag_list}) if tag_list else None
+    try:
+        page = search_index.search_with_cursor(
+            "documents", search_term, limit=limit, cursor=cursor, fuzzy=fuzzy,
+            ids=ids, filter_key=",".join(sorted(t.lower() for t in tag_list)),
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid or expired cursor")
+
+    response.headers["X-Total-Count"] = str(page["total"])
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return [hit["record"] for hit in page["hits"]]
 
 
 @router.get("/{document_id}", response_model=schemas.Document)
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
 from app import schemas
+from app.services.facet_index import facet_index, parse_tag_params
 from app.services.json_storage import json_storage
+from app.services.search_index import search_index
 from app.security import require_role
 from app.models import AccessRole
 
@@ -13,21 +15,56 @@ router = APIRouter(
 
 
 @router.get("/", response_model=List[schemas.KnowledgeBase])
-def get_knowledge_entries(skip: int = 0, limit: int = 100, category: str = None):
+def get_knowledge_entries(
+    skip: int = 0,
+    limit: int = 100,
+    category: str = None,
+    tags: Optional[List[str]] = Query(default=None),
+):
+    """Knowledge entries, optionally only those in a category and having every given tag"""
     entries = json_storage.get_all("knowledge")
-    if category:
-        entries = [e for e in entries if e.get('category') == category]
+    tag_list = parse_tag_params(tags)
+    if category or tag_list:
+        ids = facet_index.filter_ids("knowledge", {"category": [category], "tags": tag_list})
+        entries = [e for e in entries if e.get('id') in ids]
     return entries[skip:skip + limit]
 
 
+@router.get("/tags")
+def get_knowledge_tags():
+    """Every tag used by knowledge entries, with entry counts"""
+    return [{"tag": v["value"], "count": v["count"]} for v in facet_index.counts("knowledge", "tags")]
+
+
 @router.get("/search/{search_term}", response_model=List[schemas.KnowledgeBase])
-def search_knowledge(search_term: str):
-    entries = json_storage.get_all("knowledge")
-    search_term_lower = search_term.lower()
-    results = [e for e in entries if
-               search_term_lower in e.get('title', '').lower() or
-               search_term_lower in e.get('content', '').lower()]
-    return results
+def search_knowledge(
+    search_term: str,
+    response: Response,
+    fuzzy: bool = True,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    tags: Optional[List[str]] = Query(default=None),
+):
+    """
+    Knowledge entries matching the search term, most relevant first
+    The total match count and next-page cursor are returned in the
+    X-Total-Count and X-Next-Cursor headers. tags (repeated or comma-separated)
+    limits results to entries having every tag.
+    """
+    tag_list = parse_tag_params(tags)
+    ids = facet_index.filter_ids("knowledge", {"tags": tag_list}) if tag_list else None
+    try:
+        page = search_index.search_with_cursor(
+            "knowledge", search_term, limit=limit, cursor=cursor, fuzzy=fuzzy,
+            ids=ids, filter_key=",".join(sorted(t.lower() for t in tag_list)),
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid or expired cursor")
+
+    response.headers["X-Total-Count"] = str(page["total"])
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return [hit["record"] for hit in page["hits"]]
 
 
 @router.get("/{entry_id}", response_model=schemas.KnowledgeBase)
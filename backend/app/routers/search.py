@@ -4,6 +4,7 @@ from typing import Dict, List, Any
 from app import models, schemas
 from app.database import get_db
 from app.services.claude_service import search_with_claude
+from app.services.request_gate import GateRejected
 from app.security import require_role
 from app.models import AccessRole
 
@@ -152,5 +153,7 @@ Documents:
             "query": search_query.query,
             "ai_analysis": ai_response
         }
+    except GateRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
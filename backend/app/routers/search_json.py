@@ -1,8 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from typing import Dict, List, Any
 from app import schemas
-from app.services.json_storage import json_storage
-from app.services.claude_service import search_with_claude
+from app.config import get_settings
+from app.services.facet_index import FACET_FIELDS, facet_index, parse_tag_params
+from app.services.request_gate import GateRejected
+from app.services.result_cache import ResultCache
+from app.services.search_index import SEARCH_CATEGORIES, decode_cursor, encode_cursor, make_snippet, search_index, tokenize
+from app.services.suggest_index import suggest_index
+from app.services.vector_index import vector_index
+from app.services.claude_service import get_response_cache_stats, search_with_claude
+from app.services.context_builder import context_builder
 from app.security import require_role
 from app.models import AccessRole
 
@@ -13,148 +21,237 @@ router = APIRouter(
 )
 
 
+# Repeated searches are served from here until a searched entity changes
+search_cache = ResultCache(max_size=256)
+
+
+# Result shape per search category
+RESULT_FIELDS = {
+    "tasks": lambda t: {
+        "id": t.get('id'),
+        "title": t.get('title'),
+        "description": t.get('description'),
+        "status": t.get('status'),
+        "priority": t.get('priority')
+    },
+    "events": lambda e: {
+        "id": e.get('id'),
+        "title": e.get('title'),
+        "description": e.get('description'),
+        "start_time": e.get('start_time'),
+        "end_time": e.get('end_time')
+    },
+    "reminders": lambda r: {
+        "id": r.get('id'),
+        "title": r.get('title'),
+        "description": r.get('description'),
+        "remind_at": r.get('remind_at')
+    },
+    "knowledge": lambda k: {
+        "id": k.get('id'),
+        "title": k.get('title'),
+        "content": None,  # Replaced by the snippet around the match
+        "category": k.get('category')
+    },
+    "documents": lambda d: {
+        "id": d.get('id'),
+        "title": d.get('title'),
+        "description": d.get('description'),
+        "file_type": d.get('file_type'),
+        "url": d.get('url')
+    },
+}
+
+
+def _cursor_query_key(search_query: schemas.SearchQuery) -> str:
+    """Identifies the query a cursor belongs to"""
+    tags = ",".join(sorted(t.lower() for t in parse_tag_params(search_query.tags)))
+    # A blank query lists everything but one with no searchable words matches
+    # nothing, so they must not share a key
+    blank = int(not search_query.query.strip())
+    return f"{blank}:{' '.join(tokenize(search_query.query))}|{int(search_query.fuzzy)}|{tags}|{search_query.mode}"
+
+
 @router.post("/")
 async def search(search_query: schemas.SearchQuery):
     """
     Global search across all data types in JSON files
+    Served from the in-memory search index and ranked by BM25 relevance
+
+    Returns up to `limit` results per category plus per-category match totals.
+    Pass `next_cursor` back as `cursor` to get the next page.
+
+    mode="semantic" ranks by TF-IDF similarity with synonym expansion instead,
+    so "garbage" finds "Take out trash"; it returns a single page.
     """
-    results: Dict[str, List[Any]] = {
-        "tasks": [],
-        "events": [],
-        "reminders": [],
-        "knowledge": [],
-        "documents": []
-    }
+    # Index reads wait while the warm-up or a rebuild holds the index lock,
+    # so keep them off the event loop
+    return await run_in_threadpool(_cached_search, search_query)
+
+
+def _cached_search(search_query: schemas.SearchQuery) -> Dict[str, Any]:
+    categories = [c for c in RESULT_FIELDS if c in (search_query.categories or RESULT_FIELDS)]
+    if parse_tag_params(search_query.tags):
+        # Only tagged categories can match a tag filter
+        categories = [c for c in categories if SEARCH_CATEGORIES[c][0] in FACET_FIELDS]
+
+    # Cache key: normalized request plus the version of every index it reads.
+    # Each index updates from its own storage listener, so each has a version.
+    tagged = bool(parse_tag_params(search_query.tags))
+    cache_key = (
+        _cursor_query_key(search_query),
+        tuple(categories),
+        search_query.limit,
+        search_query.cursor,
+        tuple(
+            (
+                search_index.get_version(c),
+                facet_index.get_version(SEARCH_CATEGORIES[c][0]) if tagged else None,
+                vector_index.get_version(c) if search_query.mode == "semantic" else None,
+            )
+            for c in categories
+        ),
+    )
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return {**cached, "query": search_query.query}
+
+    response = _run_search(search_query, categories)
+    search_cache.set(cache_key, response)
+    return response
+
+
+def _run_search(search_query: schemas.SearchQuery, categories: List[str]) -> Dict[str, Any]:
+    results: Dict[str, List[Any]] = {category: [] for category in RESULT_FIELDS}
+    totals: Dict[str, int] = {category: 0 for category in RESULT_FIELDS}
+
+    # Cursor holds the position reached in each category (None once exhausted)
+    positions: Dict[str, Any] = {}
+    if search_query.cursor:
+        try:
+            cursor = decode_cursor(search_query.cursor)
+            if not isinstance(cursor, dict) or cursor.get("q") != _cursor_query_key(search_query):
+                raise ValueError("Cursor does not belong to this query")
+            positions = cursor["p"]
+            # category -> None (exhausted) or a search_page position [score, shard, seq]
+            if not isinstance(positions, dict) or not all(
+                position is None or (isinstance(position, list) and len(position) == 3)
+                for position in positions.values()
+            ):
+                raise ValueError("Malformed cursor positions")
+        except (ValueError, KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid or expired cursor")
+
+    tag_list = parse_tag_params(search_query.tags)
+    next_positions: Dict[str, Any] = {}
+    for category in categories:
+        ids = facet_index.filter_ids(SEARCH_CATEGORIES[category][0], {"tags": tag_list}) if tag_list else None
+        if search_query.mode == "semantic":
+            page = vector_index.search_page(category, search_query.query, limit=search_query.limit, ids=ids)
+            spans = search_index.match_spans(
+                category, search_query.query, [(hit["source"], hit["id"]) for hit in page["hits"]],
+                fuzzy=search_query.fuzzy,
+            )
+            for hit in page["hits"]:
+                hit["spans"] = spans.get((hit["source"], hit["id"]), {})
+        elif search_query.cursor and positions.get(category) is None:
+            # Exhausted on an earlier page - only the total is still useful
+            page = search_index.search_page(category, search_query.query, limit=0, fuzzy=search_query.fuzzy, ids=ids)
+        else:
+            try:
+                page = search_index.search_page(
+                    category,
+                    search_query.query,
+                    limit=search_query.limit,
+                    after=positions.get(category),
+                    fuzzy=search_query.fuzzy,
+                    ids=ids,
+                )
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid or expired cursor")
+        totals[category] = page["total"]
+        next_positions[category] = list(page["next"]) if page["next"] else None
+        results[category] = [_format_hit(category, hit) for hit in page["hits"]]
 
-    query = search_query.query.lower()
-    categories = search_query.categories or ["tasks", "events", "reminders", "knowledge", "documents"]
-
-    # Search tasks
-    if "tasks" in categories:
-        all_tasks = json_storage.get_all("tasks")
-        tasks = [
-            t for t in all_tasks
-            if query in t.get('title', '').lower() or query in t.get('description', '').lower()
-        ][:10]
-        results["tasks"] = [
-            {
-                "id": t.get('id'),
-                "title": t.get('title'),
-                "description": t.get('description'),
-                "status": t.get('status'),
-                "priority": t.get('priority')
-            }
-            for t in tasks
-        ]
-
-    # Search calendar events
-    if "events" in categories:
-        all_events = json_storage.get_all("calendar")
-        events = [
-            e for e in all_events
-            if query in e.get('title', '').lower() or query in e.get('description', '').lower()
-        ][:10]
-        results["events"] = [
-            {
-                "id": e.get('id'),
-                "title": e.get('title'),
-                "description": e.get('description'),
-                "start_time": e.get('start_time'),
-                "end_time": e.get('end_time')
-            }
-            for e in events
-        ]
-
-    # Search reminders
-    if "reminders" in categories:
-        all_reminders = json_storage.get_all("reminders")
-        reminders = [
-            r for r in all_reminders
-            if query in r.get('title', '').lower() or query in r.get('description', '').lower()
-        ][:10]
-        results["reminders"] = [
-            {
-                "id": r.get('id'),
-                "title": r.get('title'),
-                "description": r.get('description'),
-                "remind_at": r.get('remind_at')
-            }
-            for r in reminders
-        ]
-
-    # Search knowledge base
-    if "knowledge" in categories:
-        all_knowledge = json_storage.get_all("knowledge")
-        knowledge = [
-            k for k in all_knowledge
-            if query in k.get('title', '').lower() or query in k.get('content', '').lower()
-        ][:10]
-        results["knowledge"] = [
-            {
-                "id": k.get('id'),
-                "title": k.get('title'),
-                "content": k.get('content', '')[:200] + "..." if len(k.get('content', '')) > 200 else k.get('content', ''),
-                "category": k.get('category')
-            }
-            for k in knowledge
-        ]
-
-    # Search documents
-    if "documents" in categories:
-        all_documents = json_storage.get_all("documents")
-        documents = [
-            d for d in all_documents
-            if query in d.get('title', '').lower() or query in d.get('description', '').lower()
-        ][:10]
-        results["documents"] = [
-            {
-                "id": d.get('id'),
-                "title": d.get('title'),
-                "description": d.get('description'),
-                "file_type": d.get('file_type'),
-                "url": d.get('url')
-            }
-            for d in documents
-        ]
+    next_cursor = None
+    if any(next_positions.values()):
+        next_cursor = encode_cursor({"q": _cursor_query_key(search_query), "p": next_positions})
 
     return {
         "query": search_query.query,
         "results": results,
-        "total_results": sum(len(v) for v in results.values())
+        "total_results": sum(len(v) for v in results.values()),
+        "totals": totals,
+        "total_matches": sum(totals.values()),
+        "next_cursor": next_cursor
     }
 
 
-@router.post("/ai")
-async def ai_search(search_query: schemas.SearchQuery):
+def _format_hit(category: str, hit: Dict[str, Any]) -> Dict[str, Any]:
+    """Result fields plus title highlights and a snippet of the body field around the match"""
+    body_field = SEARCH_CATEGORIES[category][1][-1]
+    result = RESULT_FIELDS[category](hit["record"])
+    snippet = make_snippet(hit["record"].get(body_field) or '', hit["spans"].get(body_field, []))
+    if body_field in result and result[body_field] is None:
+        result[body_field] = snippet["text"]
+    return {
+        **result,
+        "source": hit["source"],
+        "score": round(hit["score"], 4),
+        "highlights": {"title": [[s, e] for s, e, _ in hit["spans"].get("title", [])]},
+        "snippet": snippet,
+    }
+
+
+@router.get("/cache-stats")
+def get_search_cache_stats():
+    """Size, hit rate and eviction counts for the search result cache"""
+    return search_cache.get_stats()
+
+
+@router.get("/suggest")
+def suggest(prefix: str = "", limit: int = Query(default=8, ge=1, le=25)):
     """
-    AI-powered search using Claude to analyze and return relevant results from JSON files
+    Type-ahead suggestions from titles, tags and categories
     """
-    # Gather all data as context from JSON files
-    tasks = json_storage.get_all("tasks")[:50]
-    events = json_storage.get_all("calendar")[:50]
-    knowledge = json_storage.get_all("knowledge")[:50]
-    documents = json_storage.get_all("documents")[:50]
-
-    # Build context for Claude
-    context = f"""
-Tasks:
-{chr(10).join([f"- {t.get('title')}: {t.get('description', 'No description')}" for t in tasks])}
+    return {
+        "prefix": prefix,
+        "suggestions": suggest_index.suggest(prefix, limit=limit)
+    }
 
-Calendar Events:
-{chr(10).join([f"- {e.get('title')}: {e.get('description', 'No description')}" for e in events])}
 
-Knowledge Base:
-{chr(10).join([f"- {k.get('title')}: {k.get('content', '')[:100]}..." for k in knowledge])}
+@router.post("/ai")
+async def ai_search(search_query: schemas.SearchQuery):
+    """
+    AI-powered search using Claude over the records most relevant to the query
 
-Documents:
-{chr(10).join([f"- {d.get('title')}: {d.get('description', 'No description')}" for d in documents])}
-"""
+    Records are retrieved from the local search indexes and packed under the
+    configured token budget; included_records lists what Claude was shown.
+    """
+    settings = get_settings()
+    context = await run_in_threadpool(
+        context_builder.build,
+        search_query.query,
+        settings.ai_context_token_budget,
+        settings.ai_context_top_k,
+    )
 
     try:
-        ai_response = await search_with_claude(search_query.query, context)
+        ai_response = await search_with_claude(search_query.query, context["text"])
         return {
             "query": search_query.query,
-            "ai_analysis": ai_response
+            "ai_analysis": ai_response,
+            "included_records": context["included"],
+            "context_tokens": context["estimated_tokens"],
+            "context_truncated": context["truncated"],
         }
+    except GateRejected:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/ai/cache-stats")
+def get_ai_cache_stats():
+    """Size, hit rate, evictions and expirations for the cached Claude answers"""
+    return get_response_cache_stats()
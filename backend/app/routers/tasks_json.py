@@ -4,6 +4,7 @@ from datetime import datetime
 from app import schemas
 from app.services.json_storage import json_storage
 from app.services.sheets_service import sheets_service
+from app.services.circuit_breaker import CircuitOpenError
 from app.security import require_role, get_current_user
 from app.models import AccessRole
 import logging
@@ -17,6 +18,14 @@ router = APIRouter(
 )
 
 
+def _get_json_tasks(skip: int, limit: int, include_archived: bool) -> List[dict]:
+    """Read tasks from JSON storage (fallback when Google Sheets is unavailable)"""
+    tasks = json_storage.get_all("tasks")
+    if not include_archived:
+        tasks = [t for t in tasks if not t.get('is_archived', False)]
+    return tasks[skip:skip + limit]
+
+
 @router.get("/", response_model=List[dict])
 def get_tasks(
     skip: int = 0,
@@ -33,10 +42,11 @@ def get_tasks(
         # Check if Google Sheets service is available
         if sheets_service is None:
             logger.warning("Google Sheets service not available, falling back to JSON storage")
-            tasks = json_storage.get_all("tasks")
-            if not include_archived:
-                tasks = [t for t in tasks if not t.get('is_archived', False)]
-            return tasks[skip:skip + limit]
+            return _get_json_tasks(skip, limit, include_archived)
+
+        # Google Sheets is known to be down - skip straight to the fallback
+        if sheets_service.breaker.is_open():
+            return _get_json_tasks(skip, limit, include_archived)
 
         # Get user info
         user_label = current_user.get('label')  # e.g., 'AJB - Admin (9553AJB)'
@@ -54,24 +64,32 @@ def get_tasks(
         # Apply pagination
         return tasks[skip:skip + limit]
 
+    except CircuitOpenError:
+        return _get_json_tasks(skip, limit, include_archived)
     except Exception as e:
         logger.error(f"Error getting tasks from Google Sheet: {e}")
         # Fallback to JSON storage
         logger.info("Falling back to JSON storage due to error")
-        tasks = json_storage.get_all("tasks")
-        if not include_archived:
-            tasks = [t for t in tasks if not t.get('is_archived', False)]
-        return tasks[skip:skip + limit]
+        return _get_json_tasks(skip, limit, include_archived)
 
 
 @router.get("/archived", response_model=List[dict])
 def get_archived_tasks(skip: int = 0, limit: int = 100):
     """
     Get only archived tasks
-    Note: Google Sheet doesn't have archived tasks, so this always uses JSON storage
+    Includes tasks from Google Sheet archive tabs (read lazily) when configured
     """
     tasks = json_storage.get_all("tasks")
     archived_tasks = [t for t in tasks if t.get('is_archived', False)]
+
+    if sheets_service is not None and not sheets_service.breaker.is_open():
+        try:
+            archived_tasks = sheets_service.get_archived_tasks() + archived_tasks
+        except CircuitOpenError:
+            pass
+        except Exception as e:
+            logger.error(f"Error getting archived tasks from Google Sheet: {e}")
+
     return archived_tasks[skip:skip + limit]
 
 
@@ -151,6 +169,11 @@ def complete_task(task_id: str, current_user: dict = Depends(get_current_user)):
 
     except HTTPException:
         raise
+    except CircuitOpenError:
+        raise HTTPException(
+            status_code=503,
+            detail="Google Sheets is temporarily unavailable, please try again shortly"
+        )
     except Exception as e:
         logger.error(f"Error marking task {task_id} complete: {e}")
         raise HTTPException(status_code=500, detail=f"Error completing task: {str(e)}")
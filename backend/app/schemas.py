@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, EmailStr
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from app.models import Priority, TaskStatus, AccessRole
 
 
@@ -183,6 +183,11 @@ class ChatResponse(BaseModel):
 class SearchQuery(BaseModel):
     query: str
     categories: Optional[list[str]] = None
+    fuzzy: bool = True  # Also match close misspellings ("recyling" -> "recycling")
+    limit: int = Field(default=10, ge=1, le=100)  # Results per category per page
+    cursor: Optional[str] = None  # next_cursor from the previous page
+    tags: Optional[list[str]] = None  # Only knowledge entries and documents having every tag
+    mode: Literal["keyword", "semantic"] = "keyword"  # semantic: local TF-IDF similarity with synonyms
 
 
 # Authentication Schemas
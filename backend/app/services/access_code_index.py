@@ -0,0 +1,95 @@
+"""
+In-memory index of access codes by code hash
+Codes are stored as deterministic salted hashes, so login can hash the
+submitted code once and look it up instead of checking every stored code
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from app.services.json_storage import JSONStorage, json_storage
+
+logger = logging.getLogger(__name__)
+
+ACCESS_CODES_ENTITY = "access_codes"
+
+
+class AccessCodeIndex:
+    """
+    code_hash -> access code records, built on first use
+
+    Kept in sync through the storage listener; rebuilt if the file changes
+    outside the app (detected by its fingerprint).
+    """
+
+    def __init__(self, storage: JSONStorage, entity: str = ACCESS_CODES_ENTITY):
+        self.storage = storage
+        self.entity = entity
+        self._lock = threading.Lock()
+        self._by_hash: Optional[Dict[str, Dict[Any, Dict[str, Any]]]] = None  # code_hash -> id -> record
+        self._by_id: Dict[Any, Dict[str, Any]] = {}
+        self._fingerprint: Optional[str] = None
+        storage.add_listener(self._on_storage_change)
+
+    def _build(self):
+        self._by_hash = {}
+        self._by_id = {}
+        for record in self.storage.get_all(self.entity):
+            self._add(record)
+        self._fingerprint = self.storage.get_fingerprint(self.entity)
+        logger.info(f"Access code index built: {len(self._by_id)} codes")
+
+    def _ensure(self):
+        """Build on first use or after an outside edit (caller holds the lock)"""
+        if self._by_hash is None or self.storage.get_fingerprint(self.entity) != self._fingerprint:
+            self._build()
+
+    def _add(self, record: Dict[str, Any]):
+        self._by_id[record.get('id')] = record
+        self._by_hash.setdefault(record.get('code_hash'), {})[record.get('id')] = record
+
+    def _remove(self, code_id: Any):
+        record = self._by_id.pop(code_id, None)
+        if record is None:
+            return
+        records = self._by_hash.get(record.get('code_hash'), {})
+        records.pop(code_id, None)
+        if not records:
+            self._by_hash.pop(record.get('code_hash'), None)
+
+    def _on_storage_change(self, entity: str, action: str, item: Dict[str, Any]):
+        if entity != self.entity:
+            return
+        with self._lock:
+            if self._by_hash is None:
+                return
+            self._remove(item.get('id'))
+            if action != "delete":
+                self._add(dict(item))
+            self._fingerprint = self.storage.get_fingerprint(self.entity)
+
+    def find(self, code_hash: str, active_only: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        The access code with this hash (the oldest, if stored more than once),
+        or None. Inactive codes are skipped unless active_only is False.
+        """
+        with self._lock:
+            self._ensure()
+            records = self._by_hash.get(code_hash, {})
+            for code_id in sorted(records):
+                record = records[code_id]
+                if not active_only or record.get("is_active", True):
+                    return dict(record)
+        return None
+
+    def get(self, code_id: int) -> Optional[Dict[str, Any]]:
+        """The access code with this id, or None"""
+        with self._lock:
+            self._ensure()
+            record = self._by_id.get(code_id)
+            return dict(record) if record is not None else None
+
+
+# Create a singleton instance; built on first login
+access_code_index = AccessCodeIndex(json_storage)
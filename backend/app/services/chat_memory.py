@@ -0,0 +1,178 @@
+"""
+Conversation memory for chat in JSON storage
+Each person (access code label) has their own conversation. An exchange (user
+message + reply) is appended in one write, with the oldest messages dropped
+past a per-person retention limit. Recent turns are sent back to Claude as a
+sliding window under a token budget; turns that slide out of it are folded
+into a running summary once, and the summary is stored for reuse.
+"""
+
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config import get_settings
+from app.services.claude_service import summarize_conversation
+from app.services.context_builder import estimate_tokens
+from app.services.json_storage import JSONStorage, json_storage
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+CHAT_ENTITY = "chat_history"
+SUMMARY_ENTITY = "chat_summary"
+
+# Field holding the conversation owner on messages and summaries
+OWNER_FIELD = "owner"
+
+
+def _turns(messages: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+    """Group messages into turns, each starting at a user message"""
+    turns: List[List[Dict[str, Any]]] = []
+    for message in messages:
+        if message.get('role') == "user" or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+def _as_prompt(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    return [{"role": m['role'], "content": m['content']} for m in messages]
+
+
+class ChatMemory:
+    """Stored chat messages, the prompt window over them and its summary, per owner"""
+
+    def __init__(self, storage: JSONStorage, max_messages: int):
+        self.storage = storage
+        self.max_messages = max_messages
+        # Owners with a summary refresh running, and those asking for another pass
+        self._refreshing: Set[str] = set()
+        self._rerun: Set[str] = set()
+
+    def add_exchange(self, owner: str, user_text: str, assistant_text: str) -> Dict[str, Any]:
+        """Store a message and its reply in one write; returns the reply record"""
+        _, reply = self.storage.append(
+            CHAT_ENTITY,
+            [
+                {OWNER_FIELD: owner, "role": "user", "content": user_text},
+                {OWNER_FIELD: owner, "role": "assistant", "content": assistant_text},
+            ],
+            max_items=self.max_messages,
+            partition_key=OWNER_FIELD,
+        )
+        return reply
+
+    def _messages(self, owner: str) -> List[Dict[str, Any]]:
+        return [m for m in self.storage.get_all(CHAT_ENTITY) if m.get(OWNER_FIELD) == owner]
+
+    def recent(self, owner: str, skip: int = 0, limit: int = 50) -> List[Dict[str, Any]]:
+        """Up to limit of owner's messages, oldest first, before the skip most recent ones"""
+        messages = self._messages(owner)
+        end = max(0, len(messages) - skip)
+        return messages[max(0, end - limit):end]
+
+    def clear(self, owner: str):
+        """Delete owner's messages and summary"""
+        self.storage.clear(CHAT_ENTITY, where=lambda m: m.get(OWNER_FIELD) == owner)
+        self.storage.clear(SUMMARY_ENTITY, where=lambda s: s.get(OWNER_FIELD) == owner)
+
+    def _summary(self, owner: str) -> Optional[Dict[str, Any]]:
+        for summary in self.storage.get_all(SUMMARY_ENTITY):
+            if summary.get(OWNER_FIELD) == owner:
+                return summary
+        return None
+
+    def _split(self, owner: str, token_budget: int) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+        """
+        (older messages not yet summarized, window messages, stored summary)
+
+        The window is the most recent whole turns that fit the token budget.
+        """
+        messages = self._messages(owner)
+        summary = self._summary(owner)
+        through_id = summary.get('through_id', 0) if summary else 0
+
+        window: List[Dict[str, Any]] = []
+        used = 0
+        turns = _turns(messages)
+        while turns:
+            cost = sum(estimate_tokens(m.get('content') or '') for m in turns[-1])
+            if used + cost > token_budget:
+                break
+            used += cost
+            window[:0] = turns.pop()
+        older = [m for turn in turns for m in turn if m.get('id', 0) > through_id]
+        return older, window, summary
+
+    def window(self, owner: str, token_budget: int) -> Dict[str, Any]:
+        """
+        Conversation context for owner's next message
+
+        Returns:
+            {"history": recent turns as prompt messages, "summary": text of the
+             stored summary or None}
+        """
+        _, window, summary = self._split(owner, token_budget)
+        # The API expects the conversation to open with a user turn
+        while window and window[0].get('role') != "user":
+            window.pop(0)
+        return {"history": _as_prompt(window), "summary": summary.get('text') if summary else None}
+
+    def _save_summary(self, owner: str, based_on: Optional[Dict[str, Any]], text: str, through_id: int) -> bool:
+        """
+        Store a new summary unless the stored one changed since based_on was
+        read (it would already cover these turns, or build on a newer summary)
+        """
+        current = self._summary(owner)
+        if (current or {}).get('through_id', 0) != (based_on or {}).get('through_id', 0):
+            return False
+        record = {OWNER_FIELD: owner, "text": text, "through_id": through_id}
+        if current:
+            self.storage.update(SUMMARY_ENTITY, current['id'], record)
+        else:
+            self.storage.create(SUMMARY_ENTITY, record)
+        return True
+
+    async def refresh_summary(self, owner: str, token_budget: int):
+        """
+        Fold owner's turns that have left the window into their stored summary
+
+        Runs after an exchange is saved. Only one refresh per owner runs at a
+        time; a request arriving meanwhile is served by one more pass once it
+        finishes, so each turn is summarized exactly once.
+        """
+        if owner in self._refreshing:
+            self._rerun.add(owner)
+            return
+        self._refreshing.add(owner)
+        try:
+            while True:
+                self._rerun.discard(owner)
+                await self._summarize_older(owner, token_budget)
+                if owner not in self._rerun:
+                    break
+        finally:
+            self._refreshing.discard(owner)
+            self._rerun.discard(owner)
+
+    async def _summarize_older(self, owner: str, token_budget: int):
+        older, _, summary = await asyncio.to_thread(self._split, owner, token_budget)
+        if not older:
+            # The summary already reaches the window
+            return
+        try:
+            text = await summarize_conversation(summary.get('text') if summary else None, _as_prompt(older))
+        except Exception as e:
+            logger.error(f"Chat summary refresh failed: {e}")
+            return
+        through_id = older[-1]['id']
+        if await asyncio.to_thread(self._save_summary, owner, summary, text, through_id):
+            logger.info(f"Chat summary for {owner} now covers messages through {through_id} ({len(older)} added)")
+        else:
+            logger.info(f"Chat summary for {owner} changed during refresh - discarded this one")
+
+
+# Create a singleton instance
+chat_memory = ChatMemory(json_storage, max_messages=settings.chat_history_max_messages)
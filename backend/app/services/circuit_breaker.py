@@ -0,0 +1,148 @@
+"""
+Circuit breaker for calls to flaky remote services
+Once a dependency is known to be failing, calls are rejected immediately
+instead of waiting for another timeout
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state circuit breaker
+
+    closed:    calls pass through; consecutive failures are counted
+    open:      calls fail fast with CircuitOpenError until recovery_timeout elapses
+    half_open: a limited number of trial calls are let through; a success closes
+               the circuit, a failure opens it again
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._consecutive_failures = 0
+        self._opened_at: Optional[float] = None
+        self._half_open_calls = 0
+
+        # Counters for the health endpoint
+        self._total_calls = 0
+        self._total_failures = 0
+        self._total_rejected = 0
+        self._last_error: Optional[str] = None
+        self._last_failure_at: Optional[float] = None
+
+    def _before_call(self):
+        """Decide whether a call may proceed, moving open -> half_open when due"""
+        with self._lock:
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                    self._state = self.HALF_OPEN
+                    self._half_open_calls = 0
+                    logger.info(f"Circuit '{self.name}' half-open, allowing trial call")
+                else:
+                    self._total_rejected += 1
+                    raise CircuitOpenError(f"Circuit '{self.name}' is open")
+
+            if self._state == self.HALF_OPEN:
+                if self._half_open_calls >= self.half_open_max_calls:
+                    self._total_rejected += 1
+                    raise CircuitOpenError(f"Circuit '{self.name}' is half-open, trial call in progress")
+                self._half_open_calls += 1
+
+            self._total_calls += 1
+
+    def _on_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info(f"Circuit '{self.name}' closed after successful call")
+            self._state = self.CLOSED
+            self._consecutive_failures = 0
+            self._opened_at = None
+            self._half_open_calls = 0
+
+    def _on_failure(self, error: Exception):
+        with self._lock:
+            self._total_failures += 1
+            self._consecutive_failures += 1
+            self._last_error = str(error)
+            self._last_failure_at = time.time()
+
+            if self._state == self.HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Circuit '{self.name}' opened after {self._consecutive_failures} "
+                        f"consecutive failure(s): {error}"
+                    )
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._half_open_calls = 0
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call fn through the breaker, raising CircuitOpenError if it is open"""
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._on_failure(e)
+            raise
+        self._on_success()
+        return result
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def is_open(self) -> bool:
+        """True while calls would be rejected without being attempted"""
+        return self.state == self.OPEN
+
+    def get_state(self) -> Dict[str, Any]:
+        """Snapshot of breaker state and counters for health reporting"""
+        state = self.state
+        with self._lock:
+            retry_in = None
+            if state == self.OPEN and self._opened_at is not None:
+                retry_in = round(max(0.0, self.recovery_timeout - (time.monotonic() - self._opened_at)), 1)
+            return {
+                "name": self.name,
+                "state": state,
+                "consecutive_failures": self._consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "recovery_timeout_seconds": self.recovery_timeout,
+                "retry_in_seconds": retry_in,
+                "total_calls": self._total_calls,
+                "total_failures": self._total_failures,
+                "total_rejected": self._total_rejected,
+                "last_error": self._last_error,
+                "last_failure_at": (
+                    time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self._last_failure_at))
+                    if self._last_failure_at else None
+                ),
+            }
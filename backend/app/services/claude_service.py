@@ -1,43 +1,262 @@
-from anthropic import Anthropic
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from collections import deque
+
+import httpx
+from anthropic import AsyncAnthropic, DefaultAsyncHttpxClient
 from app.config import get_settings
-from typing import Optional
+from app.services.context_builder import household_profile
+from app.services.request_gate import PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE, PRIORITY_SEARCH, GateRejected, RequestGate
+from app.services.result_cache import ResultCache
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
 
 settings = get_settings()
 
+CLAUDE_MODEL = "claude-sonnet-4-20250514"
+
+_client: Optional[AsyncAnthropic] = None
+
+# Every Anthropic call holds a slot; chat is admitted ahead of AI search
+claude_gate = RequestGate(
+    "claude",
+    max_concurrent=settings.claude_max_concurrent_requests,
+    max_queued=settings.claude_max_queued_requests,
+)
+
+# Answers to identical prompts over identical context, reused until the TTL expires
+_response_cache = ResultCache(
+    max_size=settings.claude_cache_max_size,
+    ttl_seconds=settings.claude_cache_ttl_seconds,
+)
+
+
+def get_client() -> AsyncAnthropic:
+    """
+    Shared Anthropic client, created on first use
+
+    Every call reuses its pooled HTTP connections instead of opening new ones,
+    and requests run concurrently without blocking the event loop. Set
+    ANTHROPIC_BASE_URL to send requests to a local stand-in instead.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncAnthropic(
+            api_key=settings.anthropic_api_key,
+            base_url=settings.anthropic_base_url,
+            max_retries=settings.anthropic_max_retries,
+            timeout=httpx.Timeout(
+                settings.anthropic_timeout_seconds,
+                connect=settings.anthropic_connect_timeout_seconds,
+            ),
+            http_client=DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=settings.anthropic_max_connections,
+                    max_keepalive_connections=settings.anthropic_max_connections,
+                ),
+            ),
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared client's connections (on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def _cache_key(kind: str, prompt: str, context: Optional[str], max_tokens: int) -> Tuple:
+    """Normalized prompt plus a hash of the context, so changed data never hits"""
+    normalized = " ".join((prompt or '').lower().split())
+    context_hash = hashlib.sha256((context or '').encode('utf-8')).hexdigest()
+    return (kind, CLAUDE_MODEL, max_tokens, normalized, context_hash)
+
+
+def _cache_enabled(kind: str) -> bool:
+    if settings.claude_cache_ttl_seconds <= 0:
+        return False
+    return kind != "chat" or settings.claude_cache_chat
+
+
+def get_response_cache_stats() -> Dict[str, Any]:
+    """Size, hit rate, evictions and expirations of the Claude response cache"""
+    return {
+        **_response_cache.get_stats(),
+        "enabled": _cache_enabled("search"),
+        "chat_enabled": _cache_enabled("chat"),
+    }
+
+
+CHAT_INSTRUCTIONS = "You are a helpful assistant integrated into a task planning and productivity application. Help users manage their tasks, calendar, reminders, and knowledge base effectively."
+
+SEARCH_INSTRUCTIONS = "You are a search assistant. Analyze the provided data and return relevant results based on the user's query. Be concise and highlight the most relevant information."
+
+SUMMARY_INSTRUCTIONS = "You maintain a running summary of a conversation between a user and the assistant of a task planning application. Merge the new turns into the existing summary. Keep facts, decisions, names, dates and open questions; drop small talk. Reply with the summary only."
+
+# Prompt cache token counts per call type, plus the most recent calls
+_usage_lock = threading.Lock()
+_usage_totals: Dict[str, Dict[str, int]] = {}
+_recent_calls: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+async def _system_blocks(instructions: str, volatile: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    System prompt as a stable prefix and a volatile suffix
+
+    The instructions and household profile are identical from call to call
+    and end in a cache breakpoint, so the provider can reuse them; anything
+    request-specific comes after it. The profile is built from the JSON files,
+    so it is left out in database mode.
+    """
+    blocks = [{"type": "text", "text": instructions}]
+    profile = ""
+    if settings.use_json_storage:
+        # Checks (and on change re-reads) the team and knowledge files
+        profile = await asyncio.to_thread(household_profile.text, settings.claude_profile_token_budget)
+    if profile:
+        blocks.append({"type": "text", "text": profile})
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    if volatile:
+        blocks.append({"type": "text", "text": volatile})
+    return blocks
+
+
+async def _chat_request(message: str, context: Optional[str], history: Optional[List[Dict[str, str]]],
+                  summary: Optional[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """System blocks and messages for a chat turn, earlier turns first"""
+    volatile = "\n\n".join(
+        part for part in (
+            f"Summary of the earlier conversation: {summary}" if summary else None,
+            f"Context: {context}" if context else None,
+        ) if part
+    )
+    messages = [{"role": turn["role"], "content": turn["content"]} for turn in history or []]
+    messages.append({"role": "user", "content": message})
+    return await _system_blocks(CHAT_INSTRUCTIONS, volatile or None), messages
+
+
+def _time_left(deadline: float) -> float:
+    """Request timeout for the API call so it finishes by the request's deadline"""
+    return max(1.0, deadline - time.monotonic())
 
-def get_client():
-    """Get Anthropic client instance"""
-    return Anthropic(api_key=settings.anthropic_api_key)
 
+def _prefix_text(blocks: List[Dict[str, Any]]) -> str:
+    return "\n".join(block["text"] for block in blocks)
 
-async def chat_with_claude(message: str, context: Optional[str] = None) -> str:
+
+def _record_usage(kind: str, usage: Any, started: float):
+    """Log and accumulate token counts for one call (cache fields may be absent)"""
+    counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+    elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(
+        f"Claude {kind} call: {elapsed_ms} ms, input {counts['input_tokens']}, "
+        f"cache read {counts['cache_read_input_tokens']}, cache write {counts['cache_creation_input_tokens']}, "
+        f"output {counts['output_tokens']}"
+    )
+    with _usage_lock:
+        totals = _usage_totals.setdefault(kind, {"calls": 0, **{field: 0 for field in USAGE_FIELDS}})
+        totals["calls"] += 1
+        for field, value in counts.items():
+            totals[field] += value
+        _recent_calls.append({"kind": kind, "elapsed_ms": elapsed_ms, **counts})
+
+
+def get_usage_stats() -> Dict[str, Any]:
+    """Token totals per call type (including prompt cache reads/writes) and recent calls"""
+    with _usage_lock:
+        totals = {kind: dict(values) for kind, values in _usage_totals.items()}
+        recent = list(_recent_calls)
+    for values in totals.values():
+        prompt = values["input_tokens"] + values["cache_read_input_tokens"] + values["cache_creation_input_tokens"]
+        values["cache_read_ratio"] = round(values["cache_read_input_tokens"] / prompt, 4) if prompt else 0.0
+    return {"totals": totals, "recent_calls": recent}
+
+
+async def chat_with_claude(message: str, context: Optional[str] = None,
+                           history: Optional[List[Dict[str, str]]] = None, summary: Optional[str] = None) -> str:
     """
     Send a message to Claude and get a response
 
     Args:
         message: The user's message
         context: Optional context to provide to Claude
+        history: Earlier turns of the conversation ({"role", "content"}, oldest
+            first, starting with a user turn)
+        summary: Summary of the turns older than history
 
     Returns:
         Claude's response as a string
     """
-    system_message = "You are a helpful assistant integrated into a task planning and productivity application. Help users manage their tasks, calendar, reminders, and knowledge base effectively."
+    system_blocks, messages = await _chat_request(message, context, history, summary)
 
-    if context:
-        system_message += f"\n\nContext: {context}"
+    transcript = "".join(f"\n{turn['role']}: {turn['content']}" for turn in messages[:-1])
+    cache_key = _cache_key("chat", message, _prefix_text(system_blocks) + transcript, 1024)
+    if _cache_enabled("chat"):
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
         client = get_client()
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Updated model name
-            max_tokens=1024,
-            system=system_message,
-            messages=[
-                {"role": "user", "content": message}
-            ]
-        )
+        started = time.perf_counter()
+        async with claude_gate.slot(PRIORITY_INTERACTIVE, settings.claude_request_deadline_seconds) as deadline:
+            response = await client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_blocks,
+                messages=messages,
+                timeout=_time_left(deadline),
+            )
+        _record_usage("chat", response.usage, started)
 
-        return response.content[0].text
+        text = response.content[0].text
+    except GateRejected:
+        raise
+    except Exception as e:
+        raise Exception(f"Error communicating with Claude: {str(e)}")
+
+    if _cache_enabled("chat"):
+        _response_cache.set(cache_key, text)
+    return text
+
+
+async def stream_chat_with_claude(message: str, context: Optional[str] = None,
+                                  history: Optional[List[Dict[str, str]]] = None,
+                                  summary: Optional[str] = None) -> AsyncIterator[str]:
+    """
+    Send a message to Claude and yield the response text as it is generated
+
+    history and summary are as for chat_with_claude. Closing the iterator
+    early (e.g. the client disconnected) closes the upstream stream, so no
+    further tokens are generated.
+    """
+    system_blocks, messages = await _chat_request(message, context, history, summary)
+    try:
+        client = get_client()
+        started = time.perf_counter()
+        # The slot is held until the whole reply has streamed
+        async with claude_gate.slot(PRIORITY_INTERACTIVE, settings.claude_request_deadline_seconds) as deadline:
+            async with client.messages.stream(
+                model=CLAUDE_MODEL,
+                max_tokens=1024,
+                system=system_blocks,
+                messages=messages,
+                timeout=_time_left(deadline),
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+                final = await stream.get_final_message()
+                _record_usage("chat_stream", final.usage, started)
+    except GateRejected:
+        raise
     except Exception as e:
         raise Exception(f"Error communicating with Claude: {str(e)}")
 
@@ -53,22 +272,75 @@ async def search_with_claude(query: str, data_context: str) -> str:
     Returns:
         Claude's analysis and search results
     """
-    system_message = "You are a search assistant. Analyze the provided data and return relevant results based on the user's query. Be concise and highlight the most relevant information."
+    system_blocks = await _system_blocks(SEARCH_INSTRUCTIONS)
+
+    cache_key = _cache_key("search", query, _prefix_text(system_blocks) + data_context, 2048)
+    if _cache_enabled("search"):
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
     try:
         client = get_client()
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",  # Updated model name
-            max_tokens=2048,
-            system=system_message,
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"Query: {query}\n\nData to search:\n{data_context}"
-                }
-            ]
-        )
+        started = time.perf_counter()
+        async with claude_gate.slot(PRIORITY_SEARCH, settings.claude_request_deadline_seconds) as deadline:
+            response = await client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=2048,
+                system=system_blocks,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"Query: {query}\n\nData to search:\n{data_context}"
+                    }
+                ],
+                timeout=_time_left(deadline),
+            )
+        _record_usage("search", response.usage, started)
 
-        return response.content[0].text
+        text = response.content[0].text
+    except GateRejected:
+        raise
     except Exception as e:
         raise Exception(f"Error performing search with Claude: {str(e)}")
+
+    if _cache_enabled("search"):
+        _response_cache.set(cache_key, text)
+    return text
+
+
+async def summarize_conversation(previous_summary: Optional[str], turns: List[Dict[str, str]]) -> str:
+    """
+    Fold conversation turns into a running summary
+
+    Args:
+        previous_summary: Summary of the turns before these, if any
+        turns: Turns to add ({"role", "content"}, oldest first)
+
+    Returns:
+        The updated summary
+    """
+    transcript = "\n".join(f"{turn['role'].capitalize()}: {turn['content']}" for turn in turns)
+    try:
+        client = get_client()
+        started = time.perf_counter()
+        async with claude_gate.slot(PRIORITY_BACKGROUND, settings.claude_request_deadline_seconds) as deadline:
+            response = await client.messages.create(
+                model=CLAUDE_MODEL,
+                max_tokens=settings.chat_summary_max_tokens,
+                system=SUMMARY_INSTRUCTIONS,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": f"Existing summary:\n{previous_summary or '(none)'}\n\nNew turns:\n{transcript}"
+                    }
+                ],
+                timeout=_time_left(deadline),
+            )
+        _record_usage("summary", response.usage, started)
+
+        return response.content[0].text
+    except GateRejected:
+        raise
+    except Exception as e:
+        raise Exception(f"Error summarizing conversation with Claude: {str(e)}")
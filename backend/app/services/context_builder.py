@@ -0,0 +1,298 @@
+"""
+Retrieval-augmented context for AI search
+Picks the records most relevant to the question from the local search indexes
+and packs them into a prompt under a token budget. Also renders the household
+profile (team and knowledge base) sent ahead of every prompt.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.json_storage import JSONStorage, json_storage
+from app.services.search_index import (
+    SEARCH_CATEGORIES,
+    STORAGE_SOURCE,
+    SearchIndex,
+    make_snippet,
+    search_index,
+    tokenize,
+)
+from app.services.vector_index import VectorIndex, vector_index
+
+logger = logging.getLogger(__name__)
+
+# Reciprocal rank fusion constant - dampens the lead of the very top ranks
+RRF_K = 60
+
+# Characters of description/content text quoted per record
+EXCERPT_LENGTH = 300
+
+# Date of each dated category, for questions about what is coming up
+DATE_FIELDS = {
+    "tasks": "due_date",
+    "events": "start_time",
+    "reminders": "remind_at",
+}
+
+# Words that make a question about dates ("what's due this week?")
+TIME_WORDS = frozenset((
+    "today", "tonight", "tomorrow", "week", "weekend", "month", "due", "upcoming",
+    "soon", "overdue", "agenda", "schedule", "scheduled", "deadline", "deadlines",
+))
+
+# Finished tasks are left out of upcoming and overdue lists
+CLOSED_STATUSES = frozenset(("completed", "cancelled", "done"))
+
+SECTION_TITLES = {
+    "tasks": "Tasks",
+    "events": "Calendar Events",
+    "reminders": "Reminders",
+    "knowledge": "Knowledge Base",
+    "documents": "Documents",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def date_window(query: str, now: datetime) -> Optional[Tuple[datetime, datetime, bool]]:
+    """
+    (start, end, include_overdue) for a question about dates, or None
+
+    "today"/"tomorrow" cover that day, "next week" the following Monday to
+    Sunday, "month" the next 31 days and other time words the next 7 days.
+    Asking what is due or overdue also includes unfinished past-due tasks.
+    """
+    words = set(tokenize(query))
+    if not words & TIME_WORDS:
+        return None
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if "tomorrow" in words:
+        start, days = today + timedelta(days=1), 1
+    elif words & {"today", "tonight"}:
+        start, days = today, 1
+    elif "next" in words and "week" in words:
+        start, days = today + timedelta(days=7 - today.weekday()), 7
+    elif "month" in words:
+        start, days = today, 31
+    else:
+        start, days = today, 7
+    return start, start + timedelta(days=days), bool(words & {"due", "overdue"})
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    """Stored ISO date/datetime as a naive local datetime, or None"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _describe(category: str, record: Dict[str, Any], spans: List[Tuple[int, int, str]]) -> str:
+    """One prompt line for a record, quoting its body text around the match"""
+    title = record.get('title') or 'Untitled'
+    body_field = SEARCH_CATEGORIES[category][1][-1]
+    excerpt = make_snippet(record.get(body_field) or '', spans, length=EXCERPT_LENGTH)["text"] or 'No description'
+    if category == "tasks":
+        details = ", ".join(
+            f"{label} {record[key]}" for key, label in
+            (("status", "status"), ("priority", "priority"), ("due_date", "due"), ("assignee", "assigned to"))
+            if record.get(key)
+        )
+        return f"- {title} ({details}): {excerpt}"
+    if category == "events":
+        return f"- {title} ({record.get('start_time')} to {record.get('end_time')}): {excerpt}"
+    if category == "reminders":
+        return f"- {title} (at {record.get('remind_at')}): {excerpt}"
+    if category == "knowledge" and record.get('category'):
+        return f"- {title} [{record['category']}]: {excerpt}"
+    return f"- {title}: {excerpt}"
+
+
+class ContextBuilder:
+    """Retrieves, ranks and packs records for a question"""
+
+    def __init__(self, storage: JSONStorage, keyword_index: SearchIndex, semantic_index: VectorIndex,
+                 categories: Dict[str, Tuple[str, Tuple[str, ...]]] = SEARCH_CATEGORIES):
+        self.storage = storage
+        self.keyword_index = keyword_index
+        self.semantic_index = semantic_index
+        self.categories = categories
+
+    def _by_date(self, category: str, window: Tuple[datetime, datetime, bool], top_k: int) -> List[Dict[str, Any]]:
+        """Records of a dated category falling in the window, soonest first"""
+        field = DATE_FIELDS.get(category)
+        if field is None:
+            return []
+        start, end, include_overdue = window
+        dated = []
+        for source, record in self.keyword_index.records(category):
+            when = _parse_date(record.get(field))
+            if when is None or when >= end:
+                continue
+            if category == "tasks" and str(record.get('status') or '').lower() in CLOSED_STATUSES:
+                continue
+            if when >= start or (include_overdue and category == "tasks"):
+                dated.append((when, source, record))
+        dated.sort(key=lambda entry: entry[0])
+        return [
+            {"id": record.get('id'), "source": source, "record": record, "score": 0.0, "spans": {}}
+            for _, source, record in dated[:top_k]
+        ]
+
+    def _retrieve(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        """
+        Candidates from keyword (BM25 over the question's content words),
+        semantic (TF-IDF) and, for questions about dates, upcoming records,
+        merged by reciprocal rank fusion so every ranking contributes
+        """
+        window = date_window(query, datetime.now())
+        candidates: Dict[Tuple[str, str, Any], Dict[str, Any]] = {}
+        for category in self.categories:
+            rankings = [
+                self.keyword_index.search_any(category, query, limit=top_k)["hits"],
+                self.semantic_index.search_page(category, query, limit=top_k)["hits"],
+            ]
+            if window is not None:
+                rankings.append(self._by_date(category, window, top_k))
+            for hits in rankings:
+                for rank, hit in enumerate(hits):
+                    key = (category, hit["source"], hit["id"])
+                    entry = candidates.setdefault(key, {**hit, "category": category, "fused": 0.0})
+                    entry["fused"] += 1.0 / (RRF_K + rank + 1)
+                    if hit["spans"]:
+                        entry["spans"] = hit["spans"]
+
+        # Semantic-only hits have no match offsets yet - look them up for excerpts
+        by_category: Dict[str, List[Tuple[str, Any]]] = {}
+        for category, source, doc_id in candidates:
+            if not candidates[(category, source, doc_id)]["spans"]:
+                by_category.setdefault(category, []).append((source, doc_id))
+        for category, refs in by_category.items():
+            for (source, doc_id), spans in self.keyword_index.match_spans(category, query, refs).items():
+                candidates[(category, source, doc_id)]["spans"] = spans
+        return sorted(candidates.values(), key=lambda c: -c["fused"])
+
+    def _fallback(self, per_category: int) -> List[Dict[str, Any]]:
+        """Nothing matched - offer the first records of each category instead"""
+        fallback = []
+        for category, (entity, _) in self.categories.items():
+            for item in self.storage.get_all(entity)[:per_category]:
+                fallback.append({
+                    "id": item.get('id'), "source": STORAGE_SOURCE, "record": item,
+                    "spans": {}, "category": category, "fused": 0.0,
+                })
+        return fallback
+
+    def build(self, query: str, token_budget: int, top_k: int = 20) -> Dict[str, Any]:
+        """
+        Context text for the question, packed in relevance order until the
+        token budget is reached
+
+        Returns:
+            {"text", "estimated_tokens", "included": [{"category", "id", "source", "title"}],
+             "candidates": number of records retrieved, "truncated": True if any were left out}
+        """
+        candidates = self._retrieve(query, top_k)
+        retrieved = len(candidates)
+        if not candidates:
+            candidates = self._fallback(per_category=top_k)
+
+        sections: Dict[str, List[str]] = {}
+        included = []
+        used = 0
+        for candidate in candidates:
+            category = candidate["category"]
+            body_field = SEARCH_CATEGORIES[category][1][-1]
+            line = _describe(category, candidate["record"], candidate["spans"].get(body_field, []))
+            # A new section also costs its heading
+            cost = estimate_tokens(line) + (0 if category in sections else estimate_tokens(SECTION_TITLES[category]) + 1)
+            if used + cost > token_budget:
+                continue
+            used += cost
+            sections.setdefault(category, []).append(line)
+            included.append({
+                "category": category,
+                "id": candidate["id"],
+                "source": candidate["source"],
+                "title": candidate["record"].get('title'),
+            })
+
+        text = "\n\n".join(
+            f"{SECTION_TITLES[category]}:\n" + "\n".join(sections[category])
+            for category in self.categories if category in sections
+        )
+        truncated = len(included) < len(candidates)
+        logger.info(
+            f"AI search context: {len(included)} of {len(candidates)} records, ~{used} tokens"
+            + (" (fallback)" if not retrieved else "")
+        )
+        return {
+            "text": text,
+            "estimated_tokens": used,
+            "included": included,
+            "candidates": retrieved,
+            "truncated": truncated,
+        }
+
+
+class HouseholdProfile:
+    """
+    Team roster and knowledge base digest for the stable part of Claude prompts
+
+    The text only changes when the team or knowledge files change, so it can be
+    cached by the provider and re-sent byte-for-byte identical.
+    """
+
+    def __init__(self, storage: JSONStorage):
+        self.storage = storage
+        self._lock = threading.Lock()
+        self._key: Optional[Tuple] = None
+        self._text = ""
+
+    def text(self, token_budget: int) -> str:
+        key = (self.storage.get_fingerprint("team"), self.storage.get_fingerprint("knowledge"), token_budget)
+        with self._lock:
+            if key != self._key:
+                self._text = self._render(token_budget)
+                self._key = key
+            return self._text
+
+    def _render(self, token_budget: int) -> str:
+        lines = ["Household team:"]
+        for member in self.storage.get_all("team"):
+            details = ", ".join(
+                part for part in (
+                    member.get('role'),
+                    f"{member['daily_capacity_minutes']} minutes/day" if member.get('daily_capacity_minutes') else None,
+                ) if part
+            )
+            lines.append(f"- {member.get('name') or 'Unnamed'}" + (f" ({details})" if details else ""))
+        if len(lines) == 1:
+            lines.append("- (not configured)")
+
+        lines += ["", "Household knowledge base:"]
+        used = estimate_tokens("\n".join(lines))
+        for entry in self.storage.get_all("knowledge"):
+            line = _describe("knowledge", entry, [])
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                lines.append("- (more entries omitted)")
+                break
+            used += cost
+            lines.append(line)
+        return "\n".join(lines)
+
+
+# Create singleton instances over the shared indexes
+context_builder = ContextBuilder(json_storage, search_index, vector_index)
+household_profile = HouseholdProfile(json_storage)
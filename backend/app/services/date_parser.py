@@ -0,0 +1,87 @@
+"""
+Date normalization for Google Sheets cells
+Converts sheet date strings to ISO format with a hand-rolled fast path and a bounded memo cache
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+# Enough for every distinct due/completed/created date a household sheet will hold
+DATE_CACHE_SIZE = 2048
+
+
+def _parse_slow(date_str: str) -> str:
+    """Reference implementation using strptime (handles whatever the fast path rejects)"""
+    try:
+        # Try MM/DD/YYYY format
+        return datetime.strptime(date_str, '%m/%d/%Y').isoformat()
+    except ValueError:
+        try:
+            # Try YYYY-MM-DD format
+            return datetime.strptime(date_str, '%Y-%m-%d').isoformat()
+        except ValueError:
+            # Return as-is if parsing fails
+            return date_str
+
+
+def _parse_fast(date_str: str) -> Optional[str]:
+    """
+    Parse MM/DD/YYYY (1-2 digit month/day) or YYYY-MM-DD without strptime
+
+    Returns None when the string is not one of those shapes so the caller can
+    fall back to the strptime path.
+    """
+    if '/' in date_str:
+        parts = date_str.split('/')
+        if len(parts) != 3:
+            return None
+        month, day, year = parts
+        if not (1 <= len(month) <= 2 and 1 <= len(day) <= 2 and len(year) == 4):
+            return None
+    elif len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+    else:
+        return None
+
+    if not (year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    if not (year.isascii() and month.isascii() and day.isascii()):
+        return None
+
+    try:
+        return datetime(int(year), int(month), int(day)).isoformat()
+    except ValueError:
+        # Out-of-range month/day: let strptime decide, exactly as before
+        return None
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _normalize_cached(date_str: str) -> str:
+    result = _parse_fast(date_str)
+    if result is None:
+        result = _parse_slow(date_str)
+    return result
+
+
+def parse_sheet_date(date_str: str) -> Optional[str]:
+    """
+    Parse a date from Google Sheet and convert to ISO format
+
+    Blank values become None; strings that are not a recognised date are
+    returned unchanged.
+    """
+    if not date_str or date_str.strip() == '':
+        return None
+    return _normalize_cached(date_str)
+
+
+def get_cache_stats() -> dict:
+    """Memo cache hit/miss counters"""
+    info = _normalize_cached.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
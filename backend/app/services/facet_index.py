@@ -0,0 +1,155 @@
+"""
+Facet index for knowledge entries and documents
+Tags are parsed once per write into tag -> ids sets (likewise category and
+file type), so tag listings and multi-tag filters never rescan the records
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from app.services.json_storage import JSONStorage, json_storage
+
+logger = logging.getLogger(__name__)
+
+# Storage entity -> faceted fields
+FACET_FIELDS: Dict[str, tuple] = {
+    "knowledge": ("tags", "category"),
+    "documents": ("tags", "file_type"),
+}
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Comma-separated tag string -> trimmed, non-empty tags"""
+    return [t.strip() for t in (tags or '').split(',') if t.strip()]
+
+
+def _facet_values(field: str, raw: Any) -> List[str]:
+    if field == "tags":
+        return split_tags(raw)
+    return [str(raw)] if raw not in (None, '') else []
+
+
+def _facet_key(field: str, value: str) -> str:
+    # Tags match case-insensitively; other facets keep the exact stored value
+    return value.lower() if field == "tags" else value
+
+
+class FacetIndex:
+    """Value -> ids sets per faceted field, built lazily per entity"""
+
+    def __init__(self, storage: JSONStorage, fields: Dict[str, tuple] = FACET_FIELDS):
+        self.storage = storage
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._ids: Dict[str, Dict[str, Dict[str, Set[Any]]]] = {}   # entity -> field -> key -> ids
+        self._labels: Dict[str, Dict[str, Dict[str, str]]] = {}     # entity -> field -> key -> display text
+        self._record_keys: Dict[str, Dict[Any, Dict[str, List[str]]]] = {}  # entity -> id -> field -> keys
+        self._versions: Dict[str, int] = {}  # entity -> bumped on every change
+        storage.add_listener(self._on_storage_change)
+
+    def build(self):
+        """(Re)build every entity from storage"""
+        for entity in self.fields:
+            with self._lock:
+                self._build_entity(entity)
+
+    def _build_entity(self, entity: str):
+        self._ids[entity] = {field: {} for field in self.fields[entity]}
+        self._labels[entity] = {field: {} for field in self.fields[entity]}
+        self._record_keys[entity] = {}
+        for item in self.storage.get_all(entity):
+            self._add_record(entity, item)
+        self._versions[entity] = self._versions.get(entity, 0) + 1
+        logger.info(f"Facet index built for {entity}: {len(self._record_keys[entity])} records")
+
+    def _ensure(self, entity: str):
+        """Build an entity on first use (caller holds the lock)"""
+        if entity not in self._ids:
+            self._build_entity(entity)
+
+    def _add_record(self, entity: str, item: Dict[str, Any]):
+        doc_id = item.get('id')
+        record_keys = {}
+        for field in self.fields[entity]:
+            keys = []
+            for value in _facet_values(field, item.get(field)):
+                key = _facet_key(field, value)
+                if key in keys:
+                    continue
+                keys.append(key)
+                self._ids[entity][field].setdefault(key, set()).add(doc_id)
+                self._labels[entity][field].setdefault(key, value)
+            record_keys[field] = keys
+        self._record_keys[entity][doc_id] = record_keys
+
+    def _remove_record(self, entity: str, doc_id: Any):
+        for field, keys in self._record_keys[entity].pop(doc_id, {}).items():
+            for key in keys:
+                ids = self._ids[entity][field].get(key)
+                if ids is None:
+                    continue
+                ids.discard(doc_id)
+                if not ids:
+                    del self._ids[entity][field][key]
+                    self._labels[entity][field].pop(key, None)
+
+    def _on_storage_change(self, entity: str, action: str, item: Dict[str, Any]):
+        if entity not in self.fields:
+            return
+        with self._lock:
+            if entity not in self._ids:
+                # Built lazily - the file will be read when it is
+                return
+            self._remove_record(entity, item.get('id'))
+            if action != "delete":
+                self._add_record(entity, item)
+            self._versions[entity] = self._versions.get(entity, 0) + 1
+
+    def get_version(self, entity: str) -> int:
+        """Changes whenever the entity's facets change (bumped under the index lock with the change)"""
+        with self._lock:
+            return self._versions.get(entity, 0)
+
+    def counts(self, entity: str, field: str) -> List[Dict[str, Any]]:
+        """Every value of a facet with its record count, most used first"""
+        with self._lock:
+            self._ensure(entity)
+            labels = self._labels[entity][field]
+            values = [
+                {"value": labels[key], "count": len(ids)}
+                for key, ids in self._ids[entity][field].items()
+            ]
+        values.sort(key=lambda v: (-v["count"], v["value"].lower()))
+        return values
+
+    def filter_ids(self, entity: str, filters: Dict[str, Iterable[str]]) -> Optional[Set[Any]]:
+        """
+        Ids of records having every given value of every given facet
+
+        filters maps field -> values; empty values are ignored. Returns None
+        when there is nothing to filter on (every record matches).
+        """
+        with self._lock:
+            self._ensure(entity)
+            matched: Optional[Set[Any]] = None
+            wanted = [
+                (field, _facet_key(field, value))
+                for field, values in filters.items() for value in (values or ()) if value
+            ]
+            # Smallest sets first so the running intersection stays small
+            id_sets = sorted((self._ids[entity][field].get(key, set()) for field, key in wanted), key=len)
+            for ids in id_sets:
+                matched = set(ids) if matched is None else matched & ids
+                if not matched:
+                    return set()
+            return matched
+
+
+def parse_tag_params(tags: Optional[List[str]]) -> List[str]:
+    """Tags from repeated and/or comma-separated query parameters"""
+    return [tag for value in (tags or []) for tag in split_tags(value)]
+
+
+# Create a singleton instance; entities build on first use (or by the startup warm-up)
+facet_index = FacetIndex(json_storage)
@@ -0,0 +1,94 @@
+"""
+On-disk storage for in-memory indexes
+Each index is saved as a marshal file next to the JSON data, with a manifest
+recording the data fingerprint it was built from so stale files are never used
+"""
+
+import json
+import logging
+import marshal
+import mmap
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of any persisted index changes
+INDEX_FORMAT_VERSION = 2
+
+
+def _format_tag() -> str:
+    # marshal output is only guaranteed stable within a Python minor version
+    return f"{INDEX_FORMAT_VERSION}-py{sys.version_info[0]}.{sys.version_info[1]}"
+
+
+class IndexStore:
+    """Saves and loads index payloads (plain dicts/lists/sets) under a directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _manifest_path(self) -> Path:
+        return self.directory / "manifest.json"
+
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path(), 'r') as f:
+                manifest = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if manifest.get("format") != _format_tag():
+            return {}
+        return manifest.get("indexes", {})
+
+    def load(self, name: str, fingerprint: Optional[str], schema: Any = None) -> Optional[Any]:
+        """
+        Load a saved payload if it was built from data with this fingerprint and schema
+
+        Returns None when there is no saved copy or it is stale.
+        """
+        if fingerprint is None:
+            return None
+        with self._lock:
+            entry = self._read_manifest().get(name)
+        if not entry or entry.get("fingerprint") != fingerprint or entry.get("schema") != repr(schema):
+            return None
+
+        path = self.directory / entry["file"]
+        try:
+            with open(path, 'rb') as f:
+                # Map the file instead of reading it into a separate bytes copy
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    return marshal.loads(mapped)
+        except (OSError, ValueError, EOFError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable index file {path}: {e}")
+            return None
+
+    @staticmethod
+    def serialize(payload: Any) -> bytes:
+        """Encode a payload for save() - do this while the payload cannot change"""
+        return marshal.dumps(payload)
+
+    def save(self, name: str, fingerprint: Optional[str], data: bytes, schema: Any = None):
+        """Atomically write a serialized payload and record the data fingerprint it reflects"""
+        if fingerprint is None:
+            return
+        file_name = f"{name}.idx"
+
+        with self._lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.directory / f"{file_name}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.directory / file_name)
+
+            indexes = self._read_manifest()
+            indexes[name] = {"file": file_name, "fingerprint": fingerprint, "schema": repr(schema), "bytes": len(data)}
+            manifest_tmp = self.directory / "manifest.json.tmp"
+            with open(manifest_tmp, 'w') as f:
+                json.dump({"format": _format_tag(), "indexes": indexes}, f, indent=2)
+            os.replace(manifest_tmp, self._manifest_path())
@@ -1,9 +1,14 @@
 import json
+import logging
 import os
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 # JSON file paths - can be configured via environment variable
 JSON_DATA_DIR = os.getenv('JSON_DATA_DIR', '/home/ajbir/task-planner-app/data')
 
@@ -14,12 +19,58 @@ class JSONStorage:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(parents=True, exist_ok=True)
 
+        # Change notification for in-memory indexes kept in sync with the files
+        self._listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
+
+        # One lock per entity around each read-modify-write of its file
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def add_listener(self, callback: Callable[[str, str, Dict[str, Any]], None]):
+        """
+        Register a callback(entity, action, item) called after every write
+
+        action is one of "create", "update" or "delete"; for deletes, item is
+        the record that was removed.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self, entity: str, action: str, item: Dict[str, Any]):
+        for callback in list(self._listeners):
+            try:
+                callback(entity, action, item)
+            except Exception as e:
+                logger.error(f"Storage listener failed for {action} on {entity}: {e}")
+
+    def get_fingerprint(self, entity: str) -> Optional[str]:
+        """
+        Identifies the current contents of an entity's file across restarts
+        (modification time and size), or None if the file does not exist
+        """
+        try:
+            stat = self._get_file_path(entity).stat()
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _lock(self, entity: str) -> threading.RLock:
+        with self._locks_guard:
+            lock = self._locks.get(entity)
+            if lock is None:
+                lock = self._locks[entity] = threading.RLock()
+            return lock
+
     def _get_file_path(self, entity: str) -> Path:
         """Get the file path for a given entity"""
         return self.data_dir / f"{entity}.json"
 
-    def _read_json(self, entity: str) -> Dict[str, List[Dict[str, Any]]]:
-        """Read JSON file"""
+    def _read_json(self, entity: str, strict: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Read JSON file
+
+        An unreadable file reads as empty unless strict is set - writes use
+        strict so they never replace a damaged file with an empty list.
+        """
         file_path = self._get_file_path(entity)
         if not file_path.exists():
             return {entity: []}
@@ -27,14 +78,31 @@ class JSONStorage:
         try:
             with open(file_path, 'r') as f:
                 return json.load(f)
-        except json.JSONDecodeError:
+        except json.JSONDecodeError as e:
+            if strict:
+                logger.error(f"Refusing to write {entity}: {file_path} is not valid JSON ({e})")
+                raise
             return {entity: []}
 
     def _write_json(self, entity: str, data: Dict[str, List[Dict[str, Any]]]):
-        """Write JSON file"""
+        """Write JSON file (to a temporary file first, so readers never see it half written)"""
         file_path = self._get_file_path(entity)
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+        with self._lock(entity):
+            fd, tmp_path = tempfile.mkstemp(dir=self.data_dir, prefix=f".{entity}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2, default=str)
+                    f.flush()
+                    os.fsync(f.fileno())
+                # mkstemp creates owner-only files; keep the file's existing mode
+                os.chmod(tmp_path, file_path.stat().st_mode & 0o777 if file_path.exists() else 0o644)
+                os.replace(tmp_path, file_path)
+            except BaseException:
+                try:
+                    os.unlink(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
 
     def get_all(self, entity: str) -> List[Dict[str, Any]]:
         """Get all items for an entity"""
@@ -51,56 +119,126 @@ class JSONStorage:
 
     def create(self, entity: str, item: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new item"""
-        data = self._read_json(entity)
-        items = data.get(entity, [])
+        with self._lock(entity):
+            data = self._read_json(entity, strict=True)
+            items = data.get(entity, [])
 
-        # Generate new ID
-        max_id = max([i.get('id', 0) for i in items]) if items else 0
-        item['id'] = max_id + 1
+            # Generate new ID
+            max_id = max([i.get('id', 0) for i in items]) if items else 0
+            item['id'] = max_id + 1
 
-        # Add timestamps
-        now = datetime.utcnow().isoformat()
-        item['created_at'] = now
-        item['updated_at'] = now
+            # Add timestamps
+            now = datetime.utcnow().isoformat()
+            item['created_at'] = now
+            item['updated_at'] = now
 
-        items.append(item)
-        data[entity] = items
-        self._write_json(entity, data)
+            items.append(item)
+            data[entity] = items
+            self._write_json(entity, data)
+            self._notify(entity, "create", item)
+
+            return item
+
+    def append(self, entity: str, new_items: List[Dict[str, Any]], max_items: Optional[int] = None,
+               partition_key: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Add several items with a single file write
+
+        When max_items is set, the oldest items beyond it are dropped in the
+        same write (bounded retention for append-only logs). With partition_key,
+        the limit applies separately to each value of that field.
+        """
+        with self._lock(entity):
+            data = self._read_json(entity, strict=True)
+            items = data.get(entity, [])
+
+            next_id = (max([i.get('id', 0) for i in items]) if items else 0) + 1
+            now = datetime.utcnow().isoformat()
+            for offset, item in enumerate(new_items):
+                item['id'] = next_id + offset
+                item['created_at'] = now
+                item['updated_at'] = now
+            items.extend(new_items)
+
+            removed = []
+            if max_items is not None:
+                kept: Dict[Any, int] = {}
+                retained = []
+                # Newest first, so each partition keeps its latest items
+                for item in reversed(items):
+                    partition = item.get(partition_key) if partition_key else None
+                    if kept.get(partition, 0) < max_items:
+                        kept[partition] = kept.get(partition, 0) + 1
+                        retained.append(item)
+                    else:
+                        removed.append(item)
+                items = retained[::-1]
+                removed.reverse()
+
+            data[entity] = items
+            self._write_json(entity, data)
+            for item in removed:
+                self._notify(entity, "delete", item)
+            for item in new_items:
+                self._notify(entity, "create", item)
 
-        return item
+            return new_items
 
     def update(self, entity: str, item_id: int, updates: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """Update an existing item"""
-        data = self._read_json(entity)
-        items = data.get(entity, [])
+        with self._lock(entity):
+            data = self._read_json(entity, strict=True)
+            items = data.get(entity, [])
 
-        for i, item in enumerate(items):
-            if item.get('id') == item_id:
-                # Update fields
-                items[i].update(updates)
-                items[i]['updated_at'] = datetime.utcnow().isoformat()
+            for i, item in enumerate(items):
+                if item.get('id') == item_id:
+                    # Update fields
+                    items[i].update(updates)
+                    items[i]['updated_at'] = datetime.utcnow().isoformat()
 
-                data[entity] = items
-                self._write_json(entity, data)
+                    data[entity] = items
+                    self._write_json(entity, data)
+                    self._notify(entity, "update", items[i])
 
-                return items[i]
+                    return items[i]
 
-        return None
+            return None
 
     def delete(self, entity: str, item_id: int) -> bool:
         """Delete an item"""
-        data = self._read_json(entity)
-        items = data.get(entity, [])
+        with self._lock(entity):
+            data = self._read_json(entity, strict=True)
+            items = data.get(entity, [])
 
-        original_length = len(items)
-        items = [item for item in items if item.get('id') != item_id]
+            removed = [item for item in items if item.get('id') == item_id]
+            items = [item for item in items if item.get('id') != item_id]
 
-        if len(items) < original_length:
-            data[entity] = items
+            if removed:
+                data[entity] = items
+                self._write_json(entity, data)
+                for item in removed:
+                    self._notify(entity, "delete", item)
+                return True
+
+            return False
+
+    def clear(self, entity: str, where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> int:
+        """
+        Delete every item of an entity, or only those where(item) is true,
+        with a single file write; returns how many were removed
+        """
+        with self._lock(entity):
+            data = self._read_json(entity, strict=True)
+            items = data.get(entity, [])
+            removed = [item for item in items if where is None or where(item)]
+            if not removed:
+                return 0
+
+            data[entity] = [item for item in items if where is not None and not where(item)]
             self._write_json(entity, data)
-            return True
-
-        return False
+            for item in removed:
+                self._notify(entity, "delete", item)
+            return len(removed)
 
 
 # Create a singleton instance
@@ -0,0 +1,154 @@
+"""
+Bounded concurrency gate with a priority queue
+Limits how many outbound model requests run at once; waiting requests are
+admitted highest priority first, give up at their deadline, and are rejected
+immediately once the queue is full - unless they outrank a waiter, which is
+turned away in their place
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value = admitted first
+PRIORITY_INTERACTIVE = 0  # A person is waiting on the reply (chat)
+PRIORITY_SEARCH = 1       # AI search
+PRIORITY_BACKGROUND = 2   # Batch and maintenance work
+
+# Recent queue waits kept for percentile reporting
+WAIT_SAMPLE_SIZE = 500
+
+
+class GateRejected(Exception):
+    """The request was not admitted: queue full (429) or deadline passed while queued (503)"""
+
+    def __init__(self, reason: str, retry_after: float):
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = 429 if reason == "queue_full" else 503
+        super().__init__(
+            "Too many AI requests in progress, try again shortly" if reason == "queue_full"
+            else "Timed out waiting for an AI request slot"
+        )
+
+
+class RequestGate:
+    """asyncio concurrency limiter with priorities, deadlines and queue metrics"""
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self._running = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []  # heap of (priority, arrival, future)
+        self._arrivals = itertools.count()
+        self._waits: Deque[float] = deque(maxlen=WAIT_SAMPLE_SIZE)
+        self.admitted = 0
+        self.rejected_full = 0
+        self.timed_out = 0
+
+    def _queued(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE, timeout: float = 30.0) -> AsyncIterator[float]:
+        """
+        Hold one concurrency slot for the duration of the block
+
+        Waits at most timeout seconds for a slot. Yields the request's deadline
+        (time.monotonic() value), so the work itself can be bounded by the time
+        left. Raises GateRejected when not admitted.
+        """
+        started = time.monotonic()
+        deadline = started + timeout
+
+        if self._running >= self.max_concurrent or self._queued():
+            if self._queued() >= self.max_queued and not self._displace(priority):
+                self.rejected_full += 1
+                raise GateRejected("queue_full", retry_after=self._retry_after())
+
+            future = asyncio.get_running_loop().create_future()
+            entry = (priority, next(self._arrivals), future)
+            heapq.heappush(self._waiters, entry)
+            try:
+                await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                if not future.done():
+                    future.cancel()
+                    self.timed_out += 1
+                    logger.warning(f"{self.name}: request timed out after {timeout:.1f}s in queue")
+                    raise GateRejected("deadline", retry_after=self._retry_after())
+                # Admitted just as the wait expired - keep the slot
+            except asyncio.CancelledError:
+                # Caller went away: give the slot back if it was handed over
+                if future.done() and not future.cancelled() and future.exception() is None:
+                    self._release()
+                else:
+                    future.cancel()
+                raise
+        else:
+            self._running += 1
+
+        waited = time.monotonic() - started
+        self._waits.append(waited)
+        self.admitted += 1
+        try:
+            yield deadline
+        finally:
+            self._release()
+
+    def _displace(self, priority: int) -> bool:
+        """
+        Make room in a full queue for a request of this priority by rejecting
+        the lowest-priority, most recent waiter, if it ranks below the newcomer
+        """
+        waiting = [entry for entry in self._waiters if not entry[2].done()]
+        if not waiting:
+            return False
+        worst = max(waiting, key=lambda entry: (entry[0], entry[1]))
+        if worst[0] <= priority:
+            return False
+        self.rejected_full += 1
+        worst[2].set_exception(GateRejected("queue_full", retry_after=self._retry_after()))
+        logger.info(f"{self.name}: queued priority {worst[0]} request displaced by priority {priority}")
+        return True
+
+    def _release(self):
+        """Hand the slot to the best waiter still waiting, or free it"""
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)  # Slot passes over directly; _running is unchanged
+                return
+        self._running -= 1
+
+    def _retry_after(self) -> float:
+        # Typical time in the queue so far, with a floor of one second
+        waits = sorted(self._waits)
+        return max(1.0, round(waits[len(waits) // 2], 1)) if waits else 1.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        waits = sorted(self._waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "in_flight": self._running,
+            "queued": self._queued(),
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_full,
+            "timed_out_in_queue": self.timed_out,
+            "queue_wait_ms": {"p50": percentile(0.5), "p95": percentile(0.95), "max": percentile(1.0)},
+        }
@@ -0,0 +1,68 @@
+"""
+Size-bounded LRU cache for computed results
+Keys should include whatever versions the result depends on, so stale entries
+simply stop being hit and age out. An optional TTL also expires entries whose
+staleness a key cannot capture (e.g. answers that depend on the current date).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_MISSING = object()
+
+
+class ResultCache:
+    """Thread-safe least-recently-used cache with hit/miss/eviction counters"""
+
+    def __init__(self, max_size: int = 256, ttl_seconds: Optional[float] = None):
+        self.max_size = max(1, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Optional[float], Any]]" = OrderedDict()  # key -> (expires at, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] is not None and time.monotonic() >= entry[0]:
+                del self._entries[key]
+                self.expirations += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "ttl_seconds": self.ttl_seconds,
+            }
@@ -0,0 +1,701 @@
+"""
+In-memory inverted index for global search
+Built from JSON storage on startup and kept current through storage change notifications.
+Records held elsewhere (e.g. the Google Sheet task list) can be added to a category
+as extra in-memory sources.
+"""
+
+import base64
+import heapq
+import itertools
+import json
+import logging
+import math
+import re
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.services.index_store import IndexStore
+from app.services.json_storage import JSONStorage, json_storage
+from app.services.trigram_index import FUZZY_THRESHOLD, TrigramIndex
+
+logger = logging.getLogger(__name__)
+
+# Search category -> (storage entity, searchable fields)
+SEARCH_CATEGORIES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    "tasks": ("tasks", ("title", "description")),
+    "events": ("calendar", ("title", "description")),
+    "reminders": ("reminders", ("title", "description")),
+    "knowledge": ("knowledge", ("title", "content")),
+    "documents": ("documents", ("title", "description")),
+}
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+TITLE_BOOST = 3.0          # A title occurrence counts as this many body occurrences
+PREFIX_MATCH_WEIGHT = 0.7  # "dish" matching "dishwasher" scores below an exact "dish"
+SUBSTRING_MATCH_WEIGHT = 0.5  # "washer" inside "dishwasher"
+FUZZY_MATCH_WEIGHT = 0.6   # Scaled by similarity: "recyling" -> "recycling"
+
+# Delay before changed entities are written back to disk (batches bursts of writes)
+PERSIST_DELAY_SECONDS = 2.0
+
+# Source name reported for hits from JSON storage
+STORAGE_SOURCE = "json"
+
+# Characters of body text returned around the best match
+SNIPPET_LENGTH = 200
+
+# Words too common to help find records for a natural-language question
+STOPWORDS = frozenset("""
+    a about all an and any are as at be been but by can could did do does for from had has have how i if in
+    into is it its me my no not of on or our please s show should t tell that the their them there these
+    they this to us was we were what when where which who why will with would you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens (letters and digits)"""
+    return [token for token, _, _ in tokenize_with_offsets(text)]
+
+
+def tokenize_with_offsets(text: str) -> List[Tuple[str, int, int]]:
+    """(token, start, end) for each word, with offsets into the original text"""
+    if not text:
+        return []
+    return [(m.group().lower(), m.start(), m.end()) for m in _TOKEN_RE.finditer(str(text))]
+
+
+def make_snippet(text: str, spans: List[Tuple[int, int, str]], length: int = SNIPPET_LENGTH) -> Dict[str, Any]:
+    """
+    Window of text around the densest cluster of matches
+
+    spans are (start, end, term) match offsets from the index, sorted by start.
+    Picks the window of at most length characters covering the most distinct
+    terms, without scanning the text itself.
+
+    Returns:
+        {"text": snippet with "..." where cut, "highlights": [[start, end]] in the snippet}
+    """
+    text = text or ''
+    if len(text) <= length:
+        return {"text": text, "highlights": [[s, e] for s, e, _ in spans]}
+    if not spans:
+        return {"text": text[:length] + "...", "highlights": []}
+
+    # Two pointers over the sorted spans: best = most distinct terms, then earliest
+    best = (0, 0, 0)  # (distinct terms, first span, last span)
+    counts: Dict[str, int] = {}
+    j = 0
+    for i, (start, _, _) in enumerate(spans):
+        while j < len(spans) and spans[j][1] - start <= length:
+            counts[spans[j][2]] = counts.get(spans[j][2], 0) + 1
+            j += 1
+        if j > i and len(counts) > best[0]:
+            best = (len(counts), i, j - 1)
+        term = spans[i][2]
+        counts[term] -= 1
+        if not counts[term]:
+            del counts[term]
+    first, last = spans[best[1]], spans[best[2]]
+
+    # Center the matched region, then move the cut points to word boundaries
+    slack = length - (last[1] - first[0])
+    start = max(0, first[0] - slack // 2)
+    end = min(len(text), start + length)
+    start = max(0, end - length)
+    if start > 0:
+        space = text.find(' ', start, first[0])
+        if space != -1:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(' ', last[1], end)
+        if space != -1:
+            end = space
+
+    prefix = "..." if start > 0 else ""
+    suffix = "..." if end < len(text) else ""
+    shift = len(prefix) - start
+    return {
+        "text": prefix + text[start:end] + suffix,
+        "highlights": [[s + shift, e + shift] for s, e, _ in spans if s >= start and e <= end],
+    }
+
+
+class _EntityIndex:
+    """Postings, BM25 statistics and stored records for one storage entity"""
+
+    def __init__(self, fields: Tuple[str, ...]):
+        self.fields = fields
+        self.docs: Dict[Any, Dict[str, Any]] = {}        # id -> record, in storage order
+        self.seq: Dict[Any, int] = {}                    # id -> insertion order (tie-breaker)
+        self.doc_tf: Dict[Any, Dict[str, float]] = {}    # id -> term -> weighted term frequency
+        self.doc_len: Dict[Any, float] = {}              # id -> weighted document length
+        self.total_len = 0.0
+        self.postings: Dict[str, Set[Any]] = {}          # term -> ids
+        self.positions: Dict[Any, Dict[str, Dict[str, List[int]]]] = {}  # id -> field -> term -> [start, end, ...]
+        self.trigrams = TrigramIndex()                   # vocabulary, for substring/fuzzy lookups
+        self._next_seq = 0
+
+    def add(self, item: Dict[str, Any]):
+        doc_id = item.get('id')
+        if doc_id in self.docs:
+            self.remove(doc_id, keep_position=True)
+        else:
+            self.seq[doc_id] = self._next_seq
+            self._next_seq += 1
+
+        # Title matches count TITLE_BOOST times as much as body matches (BM25F-style)
+        tf: Dict[str, float] = {}
+        length = 0.0
+        positions: Dict[str, Dict[str, List[int]]] = {}
+        for field in self.fields:
+            weight = TITLE_BOOST if field == "title" else 1.0
+            tokens = tokenize_with_offsets(item.get(field) or '')
+            length += weight * len(tokens)
+            field_positions = positions[field] = {}
+            for token, start, end in tokens:
+                tf[token] = tf.get(token, 0.0) + weight
+                field_positions.setdefault(token, []).extend((start, end))
+
+        self.docs[doc_id] = dict(item)
+        self.positions[doc_id] = positions
+        self.doc_tf[doc_id] = tf
+        self.doc_len[doc_id] = length
+        self.total_len += length
+        for term in tf:
+            ids = self.postings.get(term)
+            if ids is None:
+                ids = self.postings[term] = set()
+                self.trigrams.add(term)
+            ids.add(doc_id)
+
+    def remove(self, doc_id: Any, keep_position: bool = False):
+        for term in self.doc_tf.pop(doc_id, ()):
+            ids = self.postings.get(term)
+            if ids is None:
+                continue
+            ids.discard(doc_id)
+            if not ids:
+                del self.postings[term]
+                self.trigrams.remove(term)
+        self.total_len -= self.doc_len.pop(doc_id, 0.0)
+        self.positions.pop(doc_id, None)
+        if not keep_position:
+            self.docs.pop(doc_id, None)
+            self.seq.pop(doc_id, None)
+
+    def to_payload(self) -> Dict[str, Any]:
+        """Plain-data snapshot for IndexStore"""
+        return {
+            "docs": self.docs,
+            "seq": self.seq,
+            "doc_tf": self.doc_tf,
+            "doc_len": self.doc_len,
+            "total_len": self.total_len,
+            "postings": self.postings,
+            "positions": self.positions,
+            "trigram_postings": self.trigrams.postings,
+            "trigram_terms": self.trigrams.terms,
+            "next_seq": self._next_seq,
+        }
+
+    @classmethod
+    def from_payload(cls, fields: Tuple[str, ...], payload: Dict[str, Any]) -> "_EntityIndex":
+        index = cls(fields)
+        index.docs = payload["docs"]
+        index.seq = payload["seq"]
+        index.doc_tf = payload["doc_tf"]
+        index.doc_len = payload["doc_len"]
+        index.total_len = payload["total_len"]
+        index.postings = payload["postings"]
+        index.positions = payload["positions"]
+        index.trigrams.postings = payload["trigram_postings"]
+        index.trigrams.terms = payload["trigram_terms"]
+        index._next_seq = payload["next_seq"]
+        return index
+
+    def expand(self, query_terms: List[str], fuzzy: bool = True, threshold: float = FUZZY_THRESHOLD,
+               substrings: bool = True) -> Dict[str, Dict[str, float]]:
+        """
+        Query term -> {vocabulary term: weight}
+
+        Exact matches outrank prefix matches, which outrank words merely containing
+        the term (left out when substrings is False). A term that is not itself an
+        indexed word (likely a typo) is also expanded to similar words, weighted
+        by trigram similarity.
+        """
+        expansions = {}
+        for q in set(query_terms):
+            terms = {}
+            for t in self.trigrams.containing(q):
+                if t == q:
+                    terms[t] = 1.0
+                elif t.startswith(q):
+                    terms[t] = PREFIX_MATCH_WEIGHT
+                elif substrings:
+                    terms[t] = SUBSTRING_MATCH_WEIGHT
+            if fuzzy and q not in self.postings:
+                for t, similarity in self.trigrams.similar(q, threshold):
+                    terms.setdefault(t, FUZZY_MATCH_WEIGHT * similarity)
+            expansions[q] = terms
+        return expansions
+
+    def match(self, expansions: Dict[str, Dict[str, float]]) -> Set[Any]:
+        """Ids of documents matching at least one expansion of every query term"""
+        matched: Optional[Set[Any]] = None
+        # Smallest candidate sets first so the running intersection stays small
+        candidate_sets = []
+        for terms in expansions.values():
+            ids: Set[Any] = set()
+            for term in terms:
+                ids |= self.postings[term]
+            candidate_sets.append(ids)
+        for ids in sorted(candidate_sets, key=len):
+            matched = ids if matched is None else matched & ids
+            if not matched:
+                return set()
+        return matched or set()
+
+    def match_any(self, expansions: Dict[str, Dict[str, float]]) -> Set[Any]:
+        """Ids of documents matching an expansion of at least one query term"""
+        matched: Set[Any] = set()
+        for terms in expansions.values():
+            for term in terms:
+                matched |= self.postings[term]
+        return matched
+
+    def spans(self, doc_id: Any, field: str, expansions: Dict[str, Dict[str, float]]) -> List[Tuple[int, int, str]]:
+        """(start, end, query term) of every match in a field, sorted by offset"""
+        field_positions = self.positions.get(doc_id, {}).get(field, {})
+        spans = []
+        for query_term, terms in expansions.items():
+            for term in terms:
+                offsets = field_positions.get(term, ())
+                for k in range(0, len(offsets), 2):
+                    spans.append((offsets[k], offsets[k + 1], query_term))
+        spans.sort()
+        return spans
+
+    def idf(self, term: str) -> float:
+        n = len(self.docs)
+        df = len(self.postings.get(term, ()))
+        return math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+
+    def score(self, doc_id: Any, expansions: Dict[str, Dict[str, float]], idf: Dict[str, float]) -> float:
+        """BM25 score of a document; each query term counts its best-matching expansion"""
+        tf = self.doc_tf[doc_id]
+        avg_len = self.total_len / len(self.docs) if self.docs else 1.0
+        norm = BM25_K1 * (1.0 - BM25_B + BM25_B * self.doc_len[doc_id] / (avg_len or 1.0))
+        total = 0.0
+        for terms in expansions.values():
+            best = 0.0
+            for term, weight in terms.items():
+                f = tf.get(term)
+                if f:
+                    best = max(best, weight * idf[term] * f * (BM25_K1 + 1.0) / (f + norm))
+            total += best
+        return total
+
+
+def _hit(source: str, index: _EntityIndex, doc_id: Any, score: float,
+         expansions: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    return {
+        "id": doc_id,
+        "source": source,
+        "record": dict(index.docs[doc_id]),
+        "score": score,
+        "spans": {field: index.spans(doc_id, field, expansions) for field in index.fields},
+    }
+
+
+class SearchIndex:
+    """
+    Inverted index over every searchable storage entity
+
+    Entities are loaded lazily on first use: from the on-disk copy when its
+    fingerprint matches the JSON file, otherwise rebuilt from storage. Changes
+    are applied incrementally and written back to disk in the background.
+
+    Extra sources registered with set_source() are searched alongside the
+    storage entity of their category. They are held in memory only - their
+    owner pushes the full record list again whenever it changes.
+    """
+
+    def __init__(self, storage: JSONStorage, categories: Dict[str, Tuple[str, Tuple[str, ...]]] = SEARCH_CATEGORIES,
+                 store: Optional[IndexStore] = None):
+        self.storage = storage
+        self.categories = categories
+        self.store = store
+        self._lock = threading.RLock()
+        self._fields: Dict[str, Tuple[str, ...]] = {entity: fields for entity, fields in categories.values()}
+        self._entities: Dict[str, _EntityIndex] = {}      # loaded entities only
+        self._fingerprints: Dict[str, Optional[str]] = {}  # data fingerprint each entity reflects
+        self._entity_versions: Dict[str, int] = {}  # bumped whenever an entity's index changes
+        self._dirty: Set[str] = set()
+        self._persist_timer: Optional[threading.Timer] = None
+        self._sources: Dict[str, List[str]] = {category: [] for category in categories}  # category -> source names
+        self._source_indexes: Dict[str, _EntityIndex] = {}
+        self._source_versions: Dict[str, int] = {}
+        storage.add_listener(self._on_storage_change)
+
+    def _schema(self, entity: str) -> Tuple:
+        # Saved indexes are only valid for the same fields and tokenizer
+        return (self._fields[entity], _TOKEN_RE.pattern, TITLE_BOOST)
+
+    def _entity(self, entity: str) -> _EntityIndex:
+        """Loaded index for an entity, loading it on first use (caller holds the lock)"""
+        index = self._entities.get(entity)
+        if index is None:
+            index = self._load_entity(entity)
+        return index
+
+    def _load_entity(self, entity: str, use_saved: bool = True) -> _EntityIndex:
+        fingerprint = self.storage.get_fingerprint(entity)
+
+        if use_saved and self.store is not None:
+            payload = self.store.load(entity, fingerprint, self._schema(entity))
+            if payload is not None:
+                index = _EntityIndex.from_payload(self._fields[entity], payload)
+                self._entities[entity] = index
+                self._fingerprints[entity] = fingerprint
+                self._bump_version(entity)
+                logger.info(f"Search index loaded from disk for {entity}: {len(index.docs)} records")
+                return index
+
+        # No saved copy, or it is stale - rebuild from the JSON file
+        index = _EntityIndex(self._fields[entity])
+        for item in self.storage.get_all(entity):
+            index.add(item)
+        self._entities[entity] = index
+        self._fingerprints[entity] = fingerprint
+        self._bump_version(entity)
+        self._mark_dirty(entity)
+        logger.info(f"Search index built for {entity}: {len(index.docs)} records, {len(index.postings)} terms")
+        return index
+
+    def warm_up(self):
+        """Load every entity (from disk where fresh) - run in a background thread at startup"""
+        for entity in self._fields:
+            try:
+                with self._lock:
+                    self._entity(entity)
+            except Exception as e:
+                logger.warning(f"Could not load search index for {entity}: {e}")
+
+    def build(self):
+        """Rebuild every entity from storage, ignoring any saved copy"""
+        for entity in self._fields:
+            self.rebuild_entity(entity)
+
+    def rebuild_entity(self, entity: str):
+        with self._lock:
+            self._load_entity(entity, use_saved=False)
+
+    def _on_storage_change(self, entity: str, action: str, item: Dict[str, Any]):
+        if entity not in self._fields:
+            return
+        with self._lock:
+            index = self._entities.get(entity)
+            if index is None:
+                # Not loaded yet - the file will be read when it is
+                return
+            if action == "delete":
+                index.remove(item.get('id'))
+            else:
+                index.add(item)
+            self._fingerprints[entity] = self.storage.get_fingerprint(entity)
+            self._bump_version(entity)
+            self._mark_dirty(entity)
+
+    def _bump_version(self, entity: str):
+        """Record that an entity's index changed (caller holds the lock)"""
+        self._entity_versions[entity] = self._entity_versions.get(entity, 0) + 1
+
+    def set_source(self, category: str, source: str, records: List[Dict[str, Any]]):
+        """
+        Replace the records of an extra source searched under category
+
+        Only records that differ from the previous call are re-indexed. Each
+        record is tagged with its source name.
+        """
+        _, fields = self.categories[category]
+        with self._lock:
+            index = self._source_indexes.get(source)
+            if index is None:
+                index = self._source_indexes[source] = _EntityIndex(fields)
+                self._sources[category].append(source)
+
+            incoming = {}
+            for record in records:
+                incoming[record.get('id')] = {**record, "source": source}
+            for doc_id in [d for d in index.docs if d not in incoming]:
+                index.remove(doc_id)
+            changed = 0
+            for doc_id, record in incoming.items():
+                if index.docs.get(doc_id) != record:
+                    index.add(record)
+                    changed += 1
+            self._source_versions[source] = self._source_versions.get(source, 0) + 1
+        logger.info(f"Search source {source} updated: {len(incoming)} records, {changed} re-indexed")
+
+    def get_version(self, category: str) -> Tuple[int, ...]:
+        """
+        Changes whenever any record searched under category changes
+
+        Versions are bumped under the index lock together with the change
+        itself, so a result computed for a version reflects that version.
+        """
+        entity, _ = self.categories[category]
+        with self._lock:
+            return (self._entity_versions.get(entity, 0),) + tuple(
+                self._source_versions[source] for source in self._sources[category]
+            )
+
+    def _mark_dirty(self, entity: str):
+        """Schedule a background write of changed entities (caller holds the lock)"""
+        if self.store is None:
+            return
+        self._dirty.add(entity)
+        if self._persist_timer is None:
+            self._persist_timer = threading.Timer(PERSIST_DELAY_SECONDS, self.flush)
+            self._persist_timer.daemon = True
+            self._persist_timer.start()
+
+    def flush(self):
+        """Write every changed entity to disk now"""
+        if self.store is None:
+            return
+        with self._lock:
+            self._persist_timer = None
+            # Serialize while holding the lock so each snapshot is consistent
+            pending = [
+                (entity, self._fingerprints.get(entity), self.store.serialize(self._entities[entity].to_payload()))
+                for entity in self._dirty if entity in self._entities
+            ]
+            self._dirty.clear()
+
+        for entity, fingerprint, data in pending:
+            try:
+                self.store.save(entity, fingerprint, data, self._schema(entity))
+            except Exception as e:
+                logger.warning(f"Could not save search index for {entity}: {e}")
+
+    def search_page(self, category: str, query: str, limit: Optional[int] = 10, after: Optional[Tuple] = None,
+                    fuzzy: bool = True, threshold: float = FUZZY_THRESHOLD,
+                    ids: Optional[Set[Any]] = None) -> Dict[str, Any]:
+        """
+        One page of records in a category for the query, ranked by BM25
+
+        Every word of the query must match a word in the record - exactly, as a
+        substring, or (with fuzzy) as a close misspelling. An empty query matches
+        every record in storage order with score 0; a query with no searchable
+        words (e.g. only punctuation) matches nothing. Extra sources are scored
+        with their own term statistics and merged into the same ranking.
+
+        Args:
+            limit: Page size (None returns every remaining match)
+            after: Position returned as "next" by the previous page
+            ids: Only consider these storage record ids (e.g. from a facet filter);
+                 extra sources are skipped when set
+
+        Returns:
+            {"hits": [{"id", "source", "record", "score", "spans"}], "total": number of matches,
+             "next": position to pass as after, or None on the last page}
+            where spans maps each indexed field to its (start, end, query term)
+            matches, for highlighting and make_snippet()
+
+        Raises ValueError if after is not a position from this method.
+        """
+        entity, _ = self.categories[category]
+        terms = tokenize(query)
+        if not terms and query.strip():
+            return {"hits": [], "total": 0, "next": None}
+        if after is not None:
+            try:
+                score, shard, seq = after
+                after = (float(score), -int(shard), -int(seq))
+            except (TypeError, ValueError) as e:
+                raise ValueError("Invalid search position") from e
+
+        with self._lock:
+            # Shard 0 is the storage entity, then extra sources in registration order
+            shards = [(STORAGE_SOURCE, self._entity(entity))]
+            if ids is None:
+                shards += [(source, self._source_indexes[source]) for source in self._sources[category]]
+
+            def shard_hits(shard: int, index: _EntityIndex, matched, expansions):
+                if expansions is None:
+                    for doc_id in matched:
+                        yield 0.0, -shard, -index.seq[doc_id], shard, doc_id
+                    return
+                idf = {t: index.idf(t) for ts in expansions.values() for t in ts}
+                for doc_id in matched:
+                    yield index.score(doc_id, expansions, idf), -shard, -index.seq[doc_id], shard, doc_id
+
+            total = 0
+            streams = []
+            shard_expansions = []
+            for shard, (_, index) in enumerate(shards):
+                expansions = None
+                if terms:
+                    expansions = index.expand(terms, fuzzy=fuzzy, threshold=threshold)
+                    matched = index.match(expansions)
+                else:
+                    matched = index.docs.keys()
+                if ids is not None:
+                    matched = matched & ids
+                total += len(matched)
+                shard_expansions.append(expansions or {})
+                streams.append(shard_hits(shard, index, matched, expansions))
+            scored = itertools.chain.from_iterable(streams)
+
+            # Position = (score, -shard, -seq); later pages hold strictly lower positions
+            if after is not None:
+                scored = (hit for hit in scored if hit[:3] < after)
+
+            remaining = [0]
+
+            def counted(hits):
+                for hit in hits:
+                    remaining[0] += 1
+                    yield hit
+
+            # Heap selection: O(n log k) instead of sorting every match
+            if limit is None:
+                top = sorted(counted(scored), reverse=True, key=lambda hit: hit[:3])
+            else:
+                top = heapq.nlargest(limit, counted(scored), key=lambda hit: hit[:3])
+
+            next_position = None
+            if top and remaining[0] > len(top):
+                score, neg_shard, neg_seq, _, _ = top[-1]
+                next_position = (score, -neg_shard, -neg_seq)
+
+            hits = [
+                _hit(shards[shard][0], shards[shard][1], doc_id, score, shard_expansions[shard])
+                for score, _, _, shard, doc_id in top
+            ]
+            return {"hits": hits, "total": total, "next": next_position}
+
+    def search_any(self, category: str, query: str, limit: int = 10, fuzzy: bool = True) -> Dict[str, Any]:
+        """
+        Records matching any content word of a natural-language question
+
+        Unlike search_page, common words ("when", "is", "the") are ignored, words
+        only match whole words or their prefixes ("vet" does not match
+        "stovetop"), and a record needs only some of the remaining words; BM25
+        ranks records matching more (and rarer) words first. Returns one page:
+        {"hits": [...same shape as search_page...], "total", "next": None}.
+        """
+        entity, _ = self.categories[category]
+        terms = [term for term in tokenize(query) if term not in STOPWORDS]
+        if not terms:
+            return {"hits": [], "total": 0, "next": None}
+        with self._lock:
+            shards = [(STORAGE_SOURCE, self._entity(entity))]
+            shards += [(source, self._source_indexes[source]) for source in self._sources[category]]
+            scored = []
+            shard_expansions = []
+            for shard, (_, index) in enumerate(shards):
+                expansions = index.expand(terms, fuzzy=fuzzy, substrings=False)
+                shard_expansions.append(expansions)
+                idf = {t: index.idf(t) for ts in expansions.values() for t in ts}
+                for doc_id in index.match_any(expansions):
+                    scored.append((index.score(doc_id, expansions, idf), -shard, -index.seq[doc_id], shard, doc_id))
+
+            top = heapq.nlargest(limit, scored, key=lambda hit: hit[:3])
+            hits = [
+                _hit(shards[shard][0], shards[shard][1], doc_id, score, shard_expansions[shard])
+                for score, _, _, shard, doc_id in top
+            ]
+            return {"hits": hits, "total": len(scored), "next": None}
+
+    def records(self, category: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """(source, record) for every record searched under category"""
+        entity, _ = self.categories[category]
+        with self._lock:
+            shards = [(STORAGE_SOURCE, self._entity(entity))]
+            shards += [(source, self._source_indexes[source]) for source in self._sources[category]]
+            return [(source, dict(record)) for source, index in shards for record in index.docs.values()]
+
+    def match_spans(self, category: str, query: str, refs: List[Tuple[str, Any]],
+                    fuzzy: bool = True) -> Dict[Tuple[str, Any], Dict[str, List[Tuple[int, int, str]]]]:
+        """
+        Match spans per field for given (source, id) records, for results found
+        some other way (e.g. semantic search)
+
+        Unlike search_page, a record does not need to match every query word;
+        spans are returned for whichever words it contains.
+        """
+        entity, _ = self.categories[category]
+        terms = tokenize(query)
+        spans: Dict[Tuple[str, Any], Dict[str, List[Tuple[int, int, str]]]] = {}
+        with self._lock:
+            indexes = {STORAGE_SOURCE: self._entity(entity)}
+            indexes.update((source, self._source_indexes[source]) for source in self._sources[category])
+            expansions: Dict[str, Dict[str, Dict[str, float]]] = {}
+            for source, doc_id in refs:
+                index = indexes.get(source)
+                if index is None or doc_id not in index.docs:
+                    continue
+                if source not in expansions:
+                    expansions[source] = index.expand(terms, fuzzy=fuzzy) if terms else {}
+                spans[(source, doc_id)] = {
+                    field: index.spans(doc_id, field, expansions[source]) for field in index.fields
+                }
+        return spans
+
+    def search_with_cursor(self, category: str, query: str, limit: int, cursor: Optional[str] = None,
+                           fuzzy: bool = True, ids: Optional[Set[Any]] = None,
+                           filter_key: str = "") -> Dict[str, Any]:
+        """
+        search_page with an opaque cursor token instead of a raw position
+
+        filter_key identifies whatever produced ids, so a cursor cannot be
+        reused with a different filter.
+
+        Returns {"hits", "total", "next_cursor"}; raises ValueError if the cursor
+        is malformed or belongs to a different query.
+        """
+        query_key = f"{category}|{' '.join(tokenize(query))}|{int(fuzzy)}|{filter_key}"
+        after = None
+        if cursor:
+            data = decode_cursor(cursor)
+            if not isinstance(data, dict) or data.get("q") != query_key or not isinstance(data.get("p"), list):
+                raise ValueError("Cursor does not belong to this query")
+            after = data["p"]
+
+        page = self.search_page(category, query, limit=limit, after=after, fuzzy=fuzzy, ids=ids)
+        return {
+            "hits": page["hits"],
+            "total": page["total"],
+            "next_cursor": encode_cursor({"q": query_key, "p": list(page["next"])}) if page["next"] else None,
+        }
+
+    def search(self, category: str, query: str, limit: Optional[int] = 10, fuzzy: bool = True,
+               threshold: float = FUZZY_THRESHOLD) -> List[Dict[str, Any]]:
+        """Top hits for the query in a category (first page of search_page)"""
+        return self.search_page(category, query, limit=limit, fuzzy=fuzzy, threshold=threshold)["hits"]
+
+
+def encode_cursor(data: Any) -> str:
+    """Opaque continuation token for a page position"""
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Any:
+    """Inverse of encode_cursor; raises ValueError for malformed tokens"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+# Create a singleton instance; entities load lazily (see warm_up)
+search_index = SearchIndex(json_storage, store=IndexStore(json_storage.data_dir / ".search_index"))
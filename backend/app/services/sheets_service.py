@@ -4,13 +4,20 @@ Handles reading and writing tasks to/from Google Sheets
 """
 
 import gspread
+import hashlib
 import json
 import os
+import threading
+import time
 from google.oauth2.service_account import Credentials
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 from datetime import datetime
 import logging
 
+from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.services.date_parser import parse_sheet_date
+from app.services.single_flight import SingleFlight
+
 logger = logging.getLogger(__name__)
 
 # User mapping: Google Sheet names → Access code labels
@@ -30,6 +37,39 @@ USER_MAPPING = {
 # Reverse mapping: Access code labels → Short names for Sheet
 REVERSE_USER_MAPPING = {v: k for k, v in USER_MAPPING.items() if k in ['Aaron', 'Rai', 'Sam', 'ZB', 'TB', 'Aur']}
 
+# Circuit breaker / timeout settings - can be configured via environment variables
+SHEETS_FAILURE_THRESHOLD = int(os.getenv('SHEETS_FAILURE_THRESHOLD', '3'))
+SHEETS_RECOVERY_SECONDS = float(os.getenv('SHEETS_RECOVERY_SECONDS', '30'))
+SHEETS_CALL_TIMEOUT_SECONDS = float(os.getenv('SHEETS_CALL_TIMEOUT_SECONDS', '5'))
+
+# Worksheet layout - comma-separated tab titles
+# Active tabs are read on every task list request; archive tabs only when asked for
+SHEETS_ACTIVE_TABS = [t.strip() for t in os.getenv('GOOGLE_SHEET_ACTIVE_TABS', '').split(',') if t.strip()]
+SHEETS_ARCHIVE_TABS = [t.strip() for t in os.getenv('GOOGLE_SHEET_ARCHIVE_TABS', '').split(',') if t.strip()]
+SHEETS_ARCHIVE_CACHE_SECONDS = float(os.getenv('SHEETS_ARCHIVE_CACHE_SECONDS', '300'))
+
+# How often the background refresher re-reads the sheet (0 disables it)
+SHEETS_REFRESH_SECONDS = float(os.getenv('SHEETS_REFRESH_SECONDS', '60'))
+
+
+class _SheetSnapshot:
+    """Parsed tasks from the last fetch of a group of worksheets"""
+
+    def __init__(self, worksheet_titles: List[str], is_archived: bool):
+        self.worksheet_titles = worksheet_titles
+        self.is_archived = is_archived
+        self.content_hash: Optional[str] = None
+        self.tasks: List[Dict] = []
+        self.row_state: Dict[str, tuple] = {}  # Task ID -> (row hash, updated_at, worksheet title)
+        self.fetched_at: Optional[float] = None
+        self.unchanged_fetches = 0
+        self.reparses = 0
+
+    @property
+    def ranges(self) -> List[str]:
+        # A bare quoted sheet title selects the whole tab in A1 notation
+        return ["'" + title.replace("'", "''") + "'" for title in self.worksheet_titles]
+
 
 class SheetsService:
     """Service for interacting with Google Sheets"""
@@ -44,6 +84,24 @@ class SheetsService:
 
             creds_json = json.loads(creds_json_str)
 
+            # Concurrent identical reads share one upstream fetch
+            self._reads = SingleFlight()
+
+            # Parsed tasks per worksheet group, reused while the sheet content is unchanged
+            self._snapshot_lock = threading.Lock()
+
+            # Called with every known sheet task whenever a read finds changed content
+            self._listeners: List[Callable[[List[Dict]], None]] = []
+            self._refresh_thread: Optional[threading.Thread] = None
+            self._refresh_stop = threading.Event()
+
+            # Fail fast once Google Sheets is known to be down
+            self.breaker = CircuitBreaker(
+                "google_sheets",
+                failure_threshold=SHEETS_FAILURE_THRESHOLD,
+                recovery_timeout=SHEETS_RECOVERY_SECONDS,
+            )
+
             # Create credentials
             self.creds = Credentials.from_service_account_info(
                 creds_json,
@@ -53,17 +111,18 @@ class SheetsService:
                 ]
             )
 
-            # Authorize client
+            # Authorize client (every HTTP call is bounded by the per-call timeout)
             self.client = gspread.authorize(self.creds)
+            self.client.set_timeout(SHEETS_CALL_TIMEOUT_SECONDS)
 
             # Get sheet ID from environment
             self.sheet_id = os.getenv('GOOGLE_SHEET_ID')
             if not self.sheet_id:
                 raise ValueError("GOOGLE_SHEET_ID environment variable not set")
 
-            # Open the worksheet
+            # Open the spreadsheet and its configured worksheets
             self.spreadsheet = self.client.open_by_key(self.sheet_id)
-            self.worksheet = self.spreadsheet.sheet1
+            self._load_worksheets()
 
             logger.info("Google Sheets service initialized successfully")
 
@@ -71,6 +130,27 @@ class SheetsService:
             logger.error(f"Failed to initialize Google Sheets service: {e}")
             raise
 
+    def _load_worksheets(self):
+        """Resolve configured tab titles to worksheets (defaults to the first tab)"""
+        worksheets = {ws.title: ws for ws in self.spreadsheet.worksheets()}
+
+        active_titles = SHEETS_ACTIVE_TABS or [self.spreadsheet.sheet1.title]
+        missing = [t for t in active_titles + SHEETS_ARCHIVE_TABS if t not in worksheets]
+        if missing:
+            raise ValueError(f"Worksheet(s) not found in Google Sheet: {', '.join(missing)}")
+
+        self.active_worksheets = [worksheets[t] for t in active_titles]
+        self.archive_worksheets = [worksheets[t] for t in SHEETS_ARCHIVE_TABS]
+        self.worksheet = self.active_worksheets[0]
+        self._worksheets_by_title = {ws.title: ws for ws in self.active_worksheets + self.archive_worksheets}
+
+        # Keep parsed snapshots across reconnects so updated_at values stay stable
+        active = getattr(self, '_active', None)
+        if active is None or active.worksheet_titles != active_titles:
+            self._active = _SheetSnapshot(active_titles, is_archived=False)
+        if getattr(self, '_archive', None) is None:
+            self._archive = _SheetSnapshot(list(SHEETS_ARCHIVE_TABS), is_archived=True)
+
     def _map_user_to_label(self, sheet_name: str) -> Optional[str]:
         """Convert Google Sheet assignee name to access code label"""
         return USER_MAPPING.get(sheet_name)
@@ -79,86 +159,234 @@ class SheetsService:
         """Convert access code label to Google Sheet name"""
         return REVERSE_USER_MAPPING.get(label)
 
-    def _parse_due_date(self, date_str: str) -> Optional[str]:
-        """Parse date from Google Sheet and convert to ISO format"""
-        if not date_str or date_str.strip() == '':
-            return None
-
+    @staticmethod
+    def _values_to_records(values: List[List[str]]) -> List[Dict]:
+        """Turn a tab's raw values (header row first) into records keyed by header"""
+        if not values:
+            return []
+        header = [str(h).strip() for h in values[0]]
+        return [
+            {h: (row[i] if i < len(row) else '') for i, h in enumerate(header) if h}
+            for row in values[1:]
+        ]
+
+    @staticmethod
+    def _parse_minutes(value) -> int:
         try:
-            # Try MM/DD/YYYY format
-            dt = datetime.strptime(date_str, '%m/%d/%Y')
-            return dt.isoformat()
+            return int(float(value)) if value not in (None, '') else 60
         except ValueError:
+            return 60
+
+    def _row_to_task(self, row: Dict, is_archived: bool = False) -> Optional[Dict]:
+        """Build a task object from a sheet record (None for rows without a title)"""
+        # Skip rows without a title
+        if not row.get('Title') or str(row.get('Title')).strip() == '':
+            return None
+
+        return {
+            'id': row.get('Task ID', ''),  # Use Task ID as primary identifier
+            'title': str(row.get('Title', '')).strip(),
+            'description': str(row.get('Description', '')).strip(),
+            'assignee': str(row.get('Assignee', '')).strip(),  # Original name from sheet
+            'priority': str(row.get('Priority', 'medium')).lower(),
+            'due_date': parse_sheet_date(str(row.get('Due Date', ''))),
+            'status': str(row.get('Status', 'todo')).lower(),
+            'time_to_complete_minutes': self._parse_minutes(row.get('Time (minutes)')),
+            'completed_at': parse_sheet_date(str(row.get('Completed Date', ''))),
+            'is_archived': is_archived,  # True only for tasks read from archive tabs
+            'created_at': parse_sheet_date(str(row.get('Created Date', ''))),
+            'updated_at': None,  # Stamped by _parse_rows
+        }
+
+    @staticmethod
+    def _hash_value(value) -> str:
+        return hashlib.sha256(
+            json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+    def _parse_values(self, snapshot: _SheetSnapshot, value_ranges: List[List[List[str]]]) -> List[Dict]:
+        """
+        Convert fetched tab values to task objects, reusing the previous result
+        when the content is unchanged
+
+        updated_at only moves forward for rows whose content actually changed, so
+        repeated reads of an unchanged sheet return identical task objects.
+        Listeners are notified only when the content changed.
+        """
+        content_hash = self._hash_value(value_ranges)
+
+        with self._snapshot_lock:
+            snapshot.fetched_at = time.monotonic()
+            if content_hash == snapshot.content_hash:
+                snapshot.unchanged_fetches += 1
+                return snapshot.tasks
+            tasks = self._reparse(snapshot, value_ranges, content_hash)
+
+        self._notify()
+        return tasks
+
+    def _reparse(self, snapshot: _SheetSnapshot, value_ranges: List[List[List[str]]], content_hash: str) -> List[Dict]:
+        """Rebuild a snapshot's tasks from changed values (caller holds the snapshot lock)"""
+        now = datetime.utcnow().isoformat()
+        tasks = []
+        row_state = {}
+        for title, values in zip(snapshot.worksheet_titles, value_ranges):
+            for row in self._values_to_records(values):
+                task = self._row_to_task(row, is_archived=snapshot.is_archived)
+                if task is None:
+                    continue
+
+                row_hash = self._hash_value(row)
+                previous = snapshot.row_state.get(task['id'])
+                task['updated_at'] = previous[1] if previous and previous[0] == row_hash else now
+                row_state[task['id']] = (row_hash, task['updated_at'], title)
+                tasks.append(task)
+
+        snapshot.content_hash = content_hash
+        snapshot.tasks = tasks
+        snapshot.row_state = row_state
+        snapshot.reparses += 1
+        return tasks
+
+    def add_listener(self, callback: Callable[[List[Dict]], None]):
+        """Register callback(tasks), called with all active and archived tasks after they change"""
+        self._listeners.append(callback)
+
+    def _notify(self):
+        tasks = self.get_cached_tasks()
+        for callback in list(self._listeners):
             try:
-                # Try YYYY-MM-DD format
-                dt = datetime.strptime(date_str, '%Y-%m-%d')
-                return dt.isoformat()
-            except ValueError:
-                # Return as-is if parsing fails
-                return date_str
+                callback(tasks)
+            except Exception as e:
+                logger.error(f"Sheet change listener failed: {e}")
+
+    def get_cached_tasks(self) -> List[Dict]:
+        """Active and archived tasks from the last reads - never calls Google Sheets"""
+        with self._snapshot_lock:
+            return self._active.tasks + self._archive.tasks
+
+    def start_background_refresh(self, interval: float = SHEETS_REFRESH_SECONDS):
+        """
+        Re-read the active tabs every interval seconds in a daemon thread (first
+        read is immediate). Archive tabs are left to get_archived_tasks().
+        """
+        if interval <= 0 or self._refresh_thread is not None:
+            return
+        self._refresh_stop.clear()
+        self._refresh_thread = threading.Thread(
+            target=self._refresh_loop, args=(interval,), name="sheets-refresh", daemon=True
+        )
+        self._refresh_thread.start()
+
+    def stop_background_refresh(self):
+        self._refresh_stop.set()
+        self._refresh_thread = None
+
+    def _refresh_loop(self, interval: float):
+        while not self._refresh_stop.is_set():
+            try:
+                # Shares in-flight reads with request handlers; listeners fire only on change
+                self._read_snapshot(self._active)
+            except CircuitOpenError:
+                logger.debug("Skipping background sheet refresh: circuit open")
+            except Exception as e:
+                logger.warning(f"Background sheet refresh failed: {e}")
+            self._refresh_stop.wait(interval)
+
+    def _fetch_values(self, snapshot: _SheetSnapshot) -> List[List[List[str]]]:
+        """Read every tab of a snapshot in one values_batch_get call"""
+        response = self.spreadsheet.values_batch_get(snapshot.ranges)
+        value_ranges = response.get('valueRanges', [])
+        return [vr.get('values', []) for vr in value_ranges]
+
+    def _read_snapshot(self, snapshot: _SheetSnapshot) -> List[Dict]:
+        # Concurrent callers share a single in-flight fetch and its result
+        value_ranges = self._reads.do(
+            ("values_batch_get", tuple(snapshot.ranges)),
+            lambda: self.breaker.call(self._fetch_values, snapshot),
+        )
+        return self._parse_values(snapshot, value_ranges)
+
+    def _filter_by_assignee(self, tasks: List[Dict], assignee_label: Optional[str]) -> List[Dict]:
+        """Filter by assignee if specified (sheet names map to access code labels)"""
+        if not assignee_label:
+            return list(tasks)
+        return [t for t in tasks if self._map_user_to_label(t['assignee']) == assignee_label]
 
     def get_assigned_tasks(self, assignee_label: str = None) -> List[Dict]:
         """
-        Read tasks from Google Sheet
+        Read tasks from the active worksheets of the Google Sheet
 
         Args:
             assignee_label: Access code label (e.g., 'AJB - Admin (9553AJB)')
                           If None, returns all tasks
 
         Returns:
-            List of task dictionaries
+            List of task dictionaries (shared with the parse cache - do not mutate)
         """
         try:
-            # Get all records (skips header row automatically)
-            rows = self.worksheet.get_all_records()
-
-            tasks = []
-            for row in rows:
-                # Skip rows without a title
-                if not row.get('Title') or str(row.get('Title')).strip() == '':
-                    continue
-
-                # Skip completed tasks (optional - you can remove this to show all)
-                # if str(row.get('Status', '')).lower() == 'completed':
-                #     continue
-
-                # Get assignee from sheet
-                sheet_assignee = str(row.get('Assignee', '')).strip()
-
-                # Map to access code label
-                task_assignee_label = self._map_user_to_label(sheet_assignee)
-
-                # Filter by assignee if specified
-                if assignee_label and task_assignee_label != assignee_label:
-                    continue
-
-                # Build task object
-                task = {
-                    'id': row.get('Task ID', ''),  # Use Task ID as primary identifier
-                    'title': str(row.get('Title', '')).strip(),
-                    'description': str(row.get('Description', '')).strip(),
-                    'assignee': sheet_assignee,  # Original name from sheet
-                    'priority': str(row.get('Priority', 'medium')).lower(),
-                    'due_date': self._parse_due_date(str(row.get('Due Date', ''))),
-                    'status': str(row.get('Status', 'todo')).lower(),
-                    'time_to_complete_minutes': int(row.get('Time (minutes)', 60)) if row.get('Time (minutes)') else 60,
-                    'completed_at': self._parse_due_date(str(row.get('Completed Date', ''))),
-                    'is_archived': False,  # Google Sheet tasks are never archived
-                    'created_at': self._parse_due_date(str(row.get('Created Date', ''))),
-                    'updated_at': datetime.utcnow().isoformat(),
-                }
-
-                tasks.append(task)
+            tasks = self._filter_by_assignee(self._read_snapshot(self._active), assignee_label)
 
             logger.info(f"Retrieved {len(tasks)} tasks from Google Sheet" +
                        (f" for {assignee_label}" if assignee_label else ""))
 
             return tasks
 
+        except CircuitOpenError:
+            # Known outage - let the caller fall back without logging every request
+            raise
         except Exception as e:
             logger.error(f"Error reading tasks from Google Sheet: {e}")
             raise
 
+    def get_archived_tasks(self, assignee_label: str = None) -> List[Dict]:
+        """
+        Read tasks from the archive worksheets
+
+        Archive tabs are never read on the hot path or by the background refresh;
+        they are fetched on first request and re-fetched at most every
+        SHEETS_ARCHIVE_CACHE_SECONDS. Each read also updates the search index.
+        """
+        snapshot = self._archive
+        if not snapshot.worksheet_titles:
+            return []
+
+        with self._snapshot_lock:
+            fresh = (
+                snapshot.fetched_at is not None
+                and time.monotonic() - snapshot.fetched_at < SHEETS_ARCHIVE_CACHE_SECONDS
+            )
+            cached = snapshot.tasks
+
+        try:
+            tasks = cached if fresh else self._read_snapshot(snapshot)
+            return self._filter_by_assignee(tasks, assignee_label)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.error(f"Error reading archived tasks from Google Sheet: {e}")
+            raise
+
+    def _find_task_cell(self, task_id: str):
+        """
+        Locate a Task ID in column A, checking the tab it was last read from first
+
+        Returns:
+            (worksheet, cell, is_archived) or (None, None, False) if not found
+        """
+        with self._snapshot_lock:
+            known = self._active.row_state.get(task_id) or self._archive.row_state.get(task_id)
+        candidates = self.active_worksheets + self.archive_worksheets
+        if known and known[2] in self._worksheets_by_title:
+            first = self._worksheets_by_title[known[2]]
+            candidates = [first] + [ws for ws in candidates if ws is not first]
+
+        for worksheet in candidates:
+            cell = self.breaker.call(worksheet.find, task_id, in_column=1)  # Column A = Task ID
+            if cell:
+                return worksheet, cell, worksheet in self.archive_worksheets
+        return None, None, False
+
     def mark_completed(self, task_id: str, completed_by_label: str) -> bool:
         """
         Mark a task as completed in Google Sheet
@@ -172,7 +400,7 @@ class SheetsService:
         """
         try:
             # Find the cell with the Task ID
-            cell = self.worksheet.find(task_id, in_column=1)  # Column A = Task ID
+            worksheet, cell, _ = self._find_task_cell(task_id)
 
             if not cell:
                 logger.warning(f"Task {task_id} not found in Google Sheet")
@@ -206,7 +434,7 @@ class SheetsService:
                 }
             ]
 
-            self.worksheet.batch_update(updates)
+            self.breaker.call(worksheet.batch_update, updates)
 
             logger.info(f"Task {task_id} marked complete by {completed_by_name}")
             return True
@@ -227,13 +455,13 @@ class SheetsService:
         """
         try:
             # Find the task
-            cell = self.worksheet.find(task_id, in_column=1)
+            worksheet, cell, is_archived = self._find_task_cell(task_id)
 
             if not cell:
                 return None
 
             # Get the entire row
-            row_values = self.worksheet.row_values(cell.row)
+            row_values = self.breaker.call(worksheet.row_values, cell.row)
 
             # Map to task structure (assuming column order from GOOGLE-SHEET-ZAPIER-INTEGRATION.md)
             if len(row_values) < 10:
@@ -245,27 +473,61 @@ class SheetsService:
                 'description': row_values[2],  # Description
                 'assignee': row_values[3],  # Assignee
                 'priority': row_values[4].lower() if len(row_values) > 4 else 'medium',
-                'due_date': self._parse_due_date(row_values[5]) if len(row_values) > 5 else None,
+                'due_date': parse_sheet_date(row_values[5]) if len(row_values) > 5 else None,
                 'status': row_values[6].lower() if len(row_values) > 6 else 'todo',
-                'completed_at': self._parse_due_date(row_values[7]) if len(row_values) > 7 else None,
-                'time_to_complete_minutes': int(row_values[9]) if len(row_values) > 9 and row_values[9] else 60,
-                'is_archived': False,
-                'created_at': self._parse_due_date(row_values[10]) if len(row_values) > 10 else None,
-                'updated_at': datetime.utcnow().isoformat(),
+                'completed_at': parse_sheet_date(row_values[7]) if len(row_values) > 7 else None,
+                'time_to_complete_minutes': self._parse_minutes(row_values[9]) if len(row_values) > 9 else 60,
+                'is_archived': is_archived,
+                'created_at': parse_sheet_date(row_values[10]) if len(row_values) > 10 else None,
+                'updated_at': self._known_updated_at(row_values[0]),
             }
 
             return task
 
+        except CircuitOpenError:
+            logger.info(f"Skipping Google Sheet lookup for {task_id}: circuit open")
+            return None
         except Exception as e:
             logger.error(f"Error getting task {task_id}: {e}")
             return None
 
+    def _known_updated_at(self, task_id: str) -> str:
+        """updated_at from the last full read, so single-task reads agree with list reads"""
+        with self._snapshot_lock:
+            state = self._active.row_state.get(task_id) or self._archive.row_state.get(task_id)
+        return state[1] if state else datetime.utcnow().isoformat()
+
+    def get_read_stats(self) -> Dict[str, int]:
+        """Report how many sheet reads went upstream, were coalesced, or were unchanged"""
+        stats = self._reads.get_stats()
+        with self._snapshot_lock:
+            stats["unchanged_fetches"] = self._active.unchanged_fetches + self._archive.unchanged_fetches
+            stats["reparses"] = self._active.reparses + self._archive.reparses
+        return stats
+
+    def get_health(self) -> Dict:
+        """Circuit breaker state and read statistics for the health endpoint"""
+        breaker = self.breaker.get_state()
+        return {
+            "available": True,
+            "status": "degraded" if breaker["state"] != CircuitBreaker.CLOSED else "healthy",
+            "call_timeout_seconds": SHEETS_CALL_TIMEOUT_SECONDS,
+            "background_refresh": self._refresh_thread is not None,
+            "worksheets": {
+                "active": self._active.worksheet_titles,
+                "archive": self._archive.worksheet_titles,
+            },
+            "circuit_breaker": breaker,
+            "reads": self.get_read_stats(),
+        }
+
     def refresh_connection(self):
         """Refresh the Google Sheets connection (useful for long-running servers)"""
         try:
             self.client = gspread.authorize(self.creds)
+            self.client.set_timeout(SHEETS_CALL_TIMEOUT_SECONDS)
             self.spreadsheet = self.client.open_by_key(self.sheet_id)
-            self.worksheet = self.spreadsheet.sheet1
+            self._load_worksheets()
             logger.info("Google Sheets connection refreshed")
         except Exception as e:
             logger.error(f"Error refreshing connection: {e}")
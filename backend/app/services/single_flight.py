@@ -0,0 +1,79 @@
+"""
+Single-flight request coalescing
+Collapses concurrent identical calls so only one upstream request is in flight per key
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _InFlightCall:
+    """State shared between the caller doing the work and everyone waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Exception = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Run a function at most once at a time per key
+
+    Callers that arrive while a call for the same key is in flight block until
+    it finishes and receive the same result (or the same exception) instead of
+    issuing their own request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Call fn() for key, or wait for and share the result of an in-flight call"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced_calls += 1
+                is_leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.upstream_calls += 1
+                is_leader = True
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+            if call.waiters:
+                logger.info(f"Coalesced {call.waiters} concurrent request(s) into one call for {key!r}")
+
+        return call.result
+
+    def get_stats(self) -> Dict[str, int]:
+        """Counts of upstream calls made and calls that were served by another caller"""
+        with self._lock:
+            return {
+                "upstream_calls": self.upstream_calls,
+                "coalesced_calls": self.coalesced_calls,
+                "in_flight": len(self._calls),
+            }
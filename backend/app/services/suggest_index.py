@@ -0,0 +1,167 @@
+"""
+Type-ahead suggestions for the search bar
+Sorted key array over record titles, tags and categories, kept current through
+storage change notifications
+"""
+
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Tuple
+
+from app.services.json_storage import JSONStorage, json_storage
+from app.services.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Storage entity -> fields offered as suggestions, by suggestion type
+SUGGEST_FIELDS: Dict[str, Dict[str, str]] = {
+    "tasks": {"title": "title"},
+    "calendar": {"title": "title"},
+    "reminders": {"title": "title"},
+    "knowledge": {"title": "title", "tags": "tag", "category": "category"},
+    "documents": {"title": "title", "tags": "tag"},
+}
+
+# Categories and tags name many records, so they rank ahead of single titles
+TYPE_RANK = {"category": 0, "tag": 1, "title": 2}
+
+# Upper bound on sorted-array entries examined per lookup
+MAX_SCAN = 500
+
+PhraseKey = Tuple[str, str]  # (suggestion type, normalized text)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def _split_tags(tags: str) -> List[str]:
+    return [t.strip() for t in (tags or '').split(',') if t.strip()]
+
+
+class SuggestIndex:
+    """
+    Prefix lookups over suggestion phrases
+
+    Each phrase is stored under its full normalized text and under every
+    word-boundary suffix, so "tra" suggests both "Trash day" and "Take out trash".
+    """
+
+    def __init__(self, storage: JSONStorage, fields: Dict[str, Dict[str, str]] = SUGGEST_FIELDS):
+        self.storage = storage
+        self.fields = fields
+        self._lock = threading.RLock()
+        self._keys: List[Tuple[str, PhraseKey]] = []             # sorted (key, phrase)
+        self._phrases: Dict[PhraseKey, Dict[str, Any]] = {}      # phrase -> {"text", "count"}
+        self._record_phrases: Dict[Tuple[str, Any], List[Tuple[PhraseKey, str]]] = {}
+        self._built = False
+        storage.add_listener(self._on_storage_change)
+
+    def build(self):
+        """(Re)build suggestions for every entity from storage"""
+        with self._lock:
+            self._built = True
+            self._keys = []
+            self._phrases = {}
+            self._record_phrases = {}
+            for entity in self.fields:
+                for item in self.storage.get_all(entity):
+                    self._add_record(entity, item)
+        logger.info(f"Suggestion index built: {len(self._phrases)} phrases")
+
+    def _record_values(self, entity: str, item: Dict[str, Any]) -> List[Tuple[PhraseKey, str]]:
+        values = []
+        for field, kind in self.fields[entity].items():
+            raw = item.get(field)
+            texts = _split_tags(raw) if kind == "tag" else [str(raw).strip()] if raw else []
+            for text in texts:
+                norm = _normalize(text)
+                if norm:
+                    values.append(((kind, norm), text))
+        return values
+
+    def _add_record(self, entity: str, item: Dict[str, Any]):
+        values = self._record_values(entity, item)
+        self._record_phrases[(entity, item.get('id'))] = values
+        for phrase, text in values:
+            entry = self._phrases.get(phrase)
+            if entry is None:
+                self._phrases[phrase] = {"text": text, "count": 1}
+                words = phrase[1].split(" ")
+                for i in range(len(words)):
+                    bisect.insort(self._keys, (" ".join(words[i:]), phrase))
+            else:
+                entry["count"] += 1
+
+    def _remove_record(self, entity: str, doc_id: Any):
+        for phrase, _ in self._record_phrases.pop((entity, doc_id), []):
+            entry = self._phrases.get(phrase)
+            if entry is None:
+                continue
+            entry["count"] -= 1
+            if entry["count"] > 0:
+                continue
+            del self._phrases[phrase]
+            words = phrase[1].split(" ")
+            for i in range(len(words)):
+                key = (" ".join(words[i:]), phrase)
+                pos = bisect.bisect_left(self._keys, key)
+                if pos < len(self._keys) and self._keys[pos] == key:
+                    del self._keys[pos]
+
+    def _on_storage_change(self, entity: str, action: str, item: Dict[str, Any]):
+        if entity not in self.fields:
+            return
+        with self._lock:
+            if not self._built:
+                # Built lazily - the files will be read when it is
+                return
+            self._remove_record(entity, item.get('id'))
+            if action != "delete":
+                self._add_record(entity, item)
+
+    def suggest(self, prefix: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        Suggestions whose text (or a later word in it) starts with prefix
+
+        Phrases that start with the prefix rank ahead of mid-phrase matches, then
+        categories and tags ahead of titles, then by how many records use them.
+        """
+        norm = _normalize(prefix)
+        if not norm:
+            return []
+        # Keep a trailing space meaningful: "car " should not suggest "carpets"
+        if prefix[-1:].isspace():
+            norm += " "
+
+        with self._lock:
+            if not self._built:
+                self.build()
+            candidates: Dict[PhraseKey, bool] = {}
+            pos = bisect.bisect_left(self._keys, (norm,))
+            end = min(len(self._keys), pos + MAX_SCAN)
+            while pos < end and self._keys[pos][0].startswith(norm):
+                key, phrase = self._keys[pos]
+                starts_phrase = key == phrase[1]
+                candidates[phrase] = candidates.get(phrase, False) or starts_phrase
+                pos += 1
+
+            ranked = sorted(
+                candidates.items(),
+                key=lambda c: (
+                    not c[1],
+                    TYPE_RANK[c[0][0]],
+                    -self._phrases[c[0]]["count"],
+                    len(c[0][1]),
+                    c[0][1],
+                ),
+            )
+            return [
+                {"text": self._phrases[phrase]["text"], "type": phrase[0], "count": self._phrases[phrase]["count"]}
+                for phrase, _ in ranked[:limit]
+            ]
+
+
+# Create a singleton instance; built on first use (or by the startup warm-up)
+suggest_index = SuggestIndex(json_storage)
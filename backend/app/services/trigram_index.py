@@ -0,0 +1,86 @@
+"""
+Trigram index over search vocabulary
+Finds indexed words that contain a fragment ("dishw" -> "dishwasher") and words
+similar to a misspelling ("recyling" -> "recycling") without scanning every word
+"""
+
+from collections import Counter
+from typing import Dict, List, Set, Tuple
+
+# Minimum trigram similarity for a fuzzy match (0-1, same default as pg_trgm)
+FUZZY_THRESHOLD = 0.3
+
+
+def trigrams(term: str) -> Set[str]:
+    """Padded trigrams of a word, pg_trgm style ("cat" -> "  c", " ca", "cat", "at ")"""
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _fragment_trigrams(fragment: str) -> Set[str]:
+    """Unpadded trigrams - every one of them occurs in any word containing the fragment"""
+    return {fragment[i:i + 3] for i in range(len(fragment) - 2)}
+
+
+class TrigramIndex:
+    """Maps trigrams to the words containing them"""
+
+    def __init__(self):
+        self.postings: Dict[str, Set[str]] = {}
+        self.terms: Set[str] = set()
+
+    def add(self, term: str):
+        if term in self.terms:
+            return
+        self.terms.add(term)
+        for gram in trigrams(term):
+            self.postings.setdefault(gram, set()).add(term)
+
+    def remove(self, term: str):
+        if term not in self.terms:
+            return
+        self.terms.discard(term)
+        for gram in trigrams(term):
+            words = self.postings.get(gram)
+            if words is not None:
+                words.discard(term)
+                if not words:
+                    del self.postings[gram]
+
+    def containing(self, fragment: str) -> Set[str]:
+        """Indexed words that contain fragment as a substring"""
+        if len(fragment) < 3:
+            # Too short to have a trigram - the vocabulary is small enough to scan
+            return {term for term in self.terms if fragment in term}
+
+        candidates = None
+        for gram in sorted(_fragment_trigrams(fragment), key=lambda g: len(self.postings.get(g, ()))):
+            words = self.postings.get(gram)
+            if not words:
+                return set()
+            candidates = set(words) if candidates is None else candidates & words
+            if not candidates:
+                return set()
+        # Trigrams can all be present without being contiguous - verify
+        return {term for term in candidates if fragment in term}
+
+    def similar(self, term: str, threshold: float = FUZZY_THRESHOLD, limit: int = 10) -> List[Tuple[str, float]]:
+        """
+        Indexed words whose trigram similarity to term is at least threshold,
+        best first
+
+        Similarity is |shared trigrams| / |trigrams in either word|.
+        """
+        grams = trigrams(term)
+        shared: Counter = Counter()
+        for gram in grams:
+            for word in self.postings.get(gram, ()):
+                shared[word] += 1
+
+        matches = []
+        for word, common in shared.items():
+            similarity = common / (len(grams) + len(trigrams(word)) - common)
+            if similarity >= threshold:
+                matches.append((word, similarity))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches[:limit]
@@ -0,0 +1,231 @@
+"""
+Local TF-IDF vector index for semantic-ish search
+Finds records that use related words ("garbage" -> "Take out trash") with NumPy
+matrix operations - no external service involved
+"""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.services.json_storage import JSONStorage, json_storage
+from app.services.search_index import SEARCH_CATEGORIES, STOPWORDS, STORAGE_SOURCE, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Words treated as interchangeable at query time
+SYNONYM_GROUPS: List[Tuple[str, ...]] = [
+    ("trash", "garbage", "rubbish", "waste"),
+    ("car", "vehicle", "auto", "automobile"),
+    ("vet", "veterinarian", "veterinary"),
+    ("doctor", "physician", "clinic", "medical"),
+    ("medicine", "medication", "prescription", "pharmacy"),
+    ("grocery", "groceries", "supermarket"),
+    ("bill", "invoice", "payment"),
+    ("lawn", "yard", "grass"),
+    ("house", "home"),
+    ("clean", "wash", "tidy"),
+    ("repair", "fix", "maintenance"),
+    ("kid", "child", "children"),
+    ("appointment", "meeting"),
+    ("insurance", "policy", "coverage"),
+]
+
+TITLE_WEIGHT = 2.0     # Title words count twice as much as body words
+SYNONYM_WEIGHT = 0.5   # A synonym counts half as much as the word itself
+MIN_SIMILARITY = 0.05  # Cosine similarity below this is not a match
+
+
+def stem(token: str) -> str:
+    """Crude suffix stripping so "bins", "cleaning" and "cleaned" share a feature"""
+    if token.endswith("ies") and len(token) > 4:
+        return token[:-3] + "y"
+    for suffix in ("ing", "ed", "es", "s"):
+        if token.endswith(suffix) and not token.endswith("ss") and len(token) - len(suffix) >= 3:
+            return token[:-len(suffix)]
+    return token
+
+
+def _features(text: str) -> List[str]:
+    """Stemmed content words - common words would make unrelated records look similar"""
+    return [stem(token) for token in tokenize(text) if token not in STOPWORDS]
+
+
+def _build_synonyms(groups: List[Tuple[str, ...]]) -> Dict[str, Set[str]]:
+    synonyms: Dict[str, Set[str]] = {}
+    for group in groups:
+        stems = {stem(word) for word in group}
+        for s in stems:
+            synonyms.setdefault(s, set()).update(stems - {s})
+    return synonyms
+
+
+class _CategoryVectors:
+    """TF-IDF matrix (one L2-normalized row per record) for one search category"""
+
+    def __init__(self, fields: Tuple[str, ...], docs: List[Tuple[str, Dict[str, Any]]]):
+        self.rows: List[Tuple[str, Any]] = [(source, record.get('id')) for source, record in docs]
+        self.records = [record for _, record in docs]
+        self.vocab: Dict[str, int] = {}
+
+        # Per-record term counts first, then one dense matrix
+        counts: List[Dict[int, float]] = []
+        for _, record in docs:
+            tf: Dict[int, float] = {}
+            for field in fields:
+                weight = TITLE_WEIGHT if field == "title" else 1.0
+                for term in _features(record.get(field) or ''):
+                    col = self.vocab.setdefault(term, len(self.vocab))
+                    tf[col] = tf.get(col, 0.0) + weight
+            counts.append(tf)
+
+        n, d = len(docs), len(self.vocab)
+        df = np.zeros(d, dtype=np.float32)
+        self.matrix = np.zeros((n, d), dtype=np.float32)
+        for i, tf in enumerate(counts):
+            if not tf:
+                continue
+            cols = np.fromiter(tf.keys(), dtype=np.int64, count=len(tf))
+            values = np.fromiter(tf.values(), dtype=np.float32, count=len(tf))
+            self.matrix[i, cols] = 1.0 + np.log(values)  # Sublinear tf
+            df[cols] += 1.0
+
+        # Smoothed idf, as in scikit-learn's TfidfVectorizer
+        self.idf = (np.log((1.0 + n) / (1.0 + df)) + 1.0).astype(np.float32)
+        self.matrix *= self.idf
+        norms = np.linalg.norm(self.matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.matrix /= norms
+
+    def query_matrix(self, queries: Sequence[str], synonyms: Dict[str, Set[str]]) -> np.ndarray:
+        """One L2-normalized query vector per row, synonyms included at reduced weight"""
+        q = np.zeros((len(queries), len(self.vocab)), dtype=np.float32)
+        for i, query in enumerate(queries):
+            for term in _features(query):
+                col = self.vocab.get(term)
+                if col is not None:
+                    q[i, col] += 1.0
+                for synonym in synonyms.get(term, ()):
+                    col = self.vocab.get(synonym)
+                    if col is not None:
+                        q[i, col] = max(q[i, col], SYNONYM_WEIGHT)
+        q *= self.idf
+        norms = np.linalg.norm(q, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return q / norms
+
+
+class VectorIndex:
+    """
+    TF-IDF vectors for every search category
+
+    A category's matrix is rebuilt on the first query after any of its records
+    change. Extra sources (e.g. Google Sheet tasks) are added with set_source().
+    """
+
+    def __init__(self, storage: JSONStorage, categories: Dict[str, Tuple[str, Tuple[str, ...]]] = SEARCH_CATEGORIES,
+                 synonym_groups: List[Tuple[str, ...]] = SYNONYM_GROUPS):
+        self.storage = storage
+        self.categories = categories
+        self.synonyms = _build_synonyms(synonym_groups)
+        self._lock = threading.Lock()
+        self._vectors: Dict[str, _CategoryVectors] = {}  # current categories only
+        self._sources: Dict[str, Dict[str, List[Dict[str, Any]]]] = {category: {} for category in categories}
+        self._entity_categories = {entity: category for category, (entity, _) in categories.items()}
+        self._versions: Dict[str, int] = {}  # category -> bumped whenever its vectors go stale
+        storage.add_listener(self._on_storage_change)
+
+    def _on_storage_change(self, entity: str, action: str, item: Dict[str, Any]):
+        category = self._entity_categories.get(entity)
+        if category is not None:
+            with self._lock:
+                self._vectors.pop(category, None)
+                self._versions[category] = self._versions.get(category, 0) + 1
+
+    def set_source(self, category: str, source: str, records: List[Dict[str, Any]]):
+        """Replace the records of an extra source searched under category"""
+        with self._lock:
+            self._sources[category][source] = [{**record, "source": source} for record in records]
+            self._vectors.pop(category, None)
+            self._versions[category] = self._versions.get(category, 0) + 1
+
+    def get_version(self, category: str) -> int:
+        """Changes whenever any record searched under category changes"""
+        with self._lock:
+            return self._versions.get(category, 0)
+
+    def _category(self, category: str) -> _CategoryVectors:
+        """Current vectors for a category, rebuilding if stale (caller holds the lock)"""
+        vectors = self._vectors.get(category)
+        if vectors is None:
+            entity, fields = self.categories[category]
+            docs = [(STORAGE_SOURCE, item) for item in self.storage.get_all(entity)]
+            for source, records in self._sources[category].items():
+                docs.extend((source, record) for record in records)
+            vectors = self._vectors[category] = _CategoryVectors(fields, docs)
+            logger.info(f"Vector index built for {category}: {len(docs)} records, {len(vectors.vocab)} features")
+        return vectors
+
+    def build(self):
+        """Build every category now (otherwise each builds on first query)"""
+        with self._lock:
+            for category in self.categories:
+                self._category(category)
+
+    def search_many(self, category: str, queries: Sequence[str], limit: int = 10,
+                    ids: Optional[Set[Any]] = None) -> List[Dict[str, Any]]:
+        """
+        Top records by cosine similarity for several queries at once
+
+        All queries are scored with a single matrix product. ids restricts
+        results to those storage record ids (extra sources are skipped).
+
+        Returns one {"hits": [{"id", "source", "record", "score", "spans"}], "total", "next"}
+        page per query, in the same shape as SearchIndex.search_page.
+        """
+        with self._lock:
+            vectors = self._category(category)
+            if not vectors.rows or not queries:
+                return [{"hits": [], "total": 0, "next": None} for _ in queries]
+
+            scores = vectors.query_matrix(queries, self.synonyms) @ vectors.matrix.T  # (queries, records)
+            if ids is not None:
+                allowed = np.fromiter(
+                    (source == STORAGE_SOURCE and doc_id in ids for source, doc_id in vectors.rows),
+                    dtype=bool, count=len(vectors.rows),
+                )
+                scores[:, ~allowed] = 0.0
+
+            pages = []
+            for row in scores:
+                matched = np.flatnonzero(row >= MIN_SIMILARITY)
+                if limit < len(matched):
+                    # Partial selection, then sort only the top k
+                    matched = matched[np.argpartition(-row[matched], limit)[:limit]]
+                top = matched[np.lexsort((matched, -row[matched]))]
+                pages.append({
+                    "hits": [
+                        {
+                            "id": vectors.rows[i][1],
+                            "source": vectors.rows[i][0],
+                            "record": dict(vectors.records[i]),
+                            "score": float(row[i]),
+                            "spans": {},
+                        }
+                        for i in top
+                    ],
+                    "total": int(np.count_nonzero(row >= MIN_SIMILARITY)),
+                    "next": None,
+                })
+            return pages
+
+    def search_page(self, category: str, query: str, limit: int = 10,
+                    ids: Optional[Set[Any]] = None) -> Dict[str, Any]:
+        """Single-query search_many; semantic results are one page (next is always None)"""
+        return self.search_many(category, [query], limit=limit, ids=ids)[0]
+
+
+# Create a singleton instance; categories build on first query
+vector_index = VectorIndex(json_storage)
@@ -0,0 +1,91 @@
+"""
+Server-Sent Events relay for streamed Claude replies
+Shared by the database-backed and JSON chat routers
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Callable, List, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.services.request_gate import GateRejected
+
+logger = logging.getLogger(__name__)
+
+
+def sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def relay_reply(
+    request: Request,
+    stream: AsyncIterator[str],
+    save: Callable[[str], Any],
+    background: Optional[BackgroundTask] = None,
+) -> StreamingResponse:
+    """
+    Relay a streamed reply to the client as Server-Sent Events
+
+    Events: "delta" {"text"} for each chunk as it arrives, then "done"
+    {"created_at", "ttft_ms", "total_ms"} once save(full reply) - run in a
+    worker thread, returning the saved reply's created_at - has finished, or
+    "error" {"detail"}. Disconnecting stops generation and nothing is saved.
+
+    The first chunk is awaited before responding, so a request the concurrency
+    gate turns away (or that fails outright) gets a real HTTP error status.
+    """
+    started = time.perf_counter()
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = ""
+    except GateRejected:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    ttft_ms = round((time.perf_counter() - started) * 1000, 1)
+    logger.info(f"Chat stream time to first token: {ttft_ms} ms")
+
+    async def remaining_chunks():
+        if first:
+            yield first
+        async for text in stream:
+            yield text
+
+    async def events():
+        parts: List[str] = []
+        try:
+            async for text in remaining_chunks():
+                if await request.is_disconnected():
+                    logger.info(f"Chat stream cancelled by client after {len(parts)} chunks")
+                    return
+                parts.append(text)
+                yield sse("delta", {"text": text})
+
+            created_at = await run_in_threadpool(save, "".join(parts))
+            total_ms = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"Chat stream finished: ttft {ttft_ms} ms, total {total_ms} ms")
+            yield sse("done", {"created_at": created_at, "ttft_ms": ttft_ms, "total_ms": total_ms})
+        except asyncio.CancelledError:
+            logger.info(f"Chat stream cancelled by client after {len(parts)} chunks")
+            raise
+        except Exception as e:
+            logger.error(f"Chat stream failed: {e}")
+            yield sse("error", {"detail": str(e)})
+        finally:
+            # Stops the upstream request if we finished early
+            await stream.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background,
+    )
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for the AI endpoints (/chat, /chat/stream and /search/ai)
+Sends batches of requests at rising concurrency to a running backend and
+reports throughput, time to first token (streaming) and latency percentiles.
+
+Run it against the local Anthropic stand-in, not the real API:
+    python mock_anthropic_server.py &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8787 JSON_DATA_DIR=/tmp/bench-data uvicorn app.main:app &
+    python bench_ai_endpoints.py --access-code 9127SAM
+
+Chat requests are added to the chat history, so use a scratch data directory.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+import httpx
+
+ENDPOINTS = ("chat", "chat_stream", "search_ai")
+
+QUERIES = (
+    "what chores are due this week",
+    "when is the vet appointment",
+    "which bills still need paying",
+    "who is taking out the trash",
+    "what did we note about the car insurance",
+)
+
+# Numbers requests across the whole run, so unique queries stay unique between
+# levels; the run tag keeps them unique between runs against the same server
+_request_numbers = itertools.count()
+RUN_TAG = format(int(time.time()), "x")
+
+
+def percentile(values, p):
+    """Nearest-rank percentile in milliseconds, or None without samples"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+
+def fmt(ms):
+    return f"{ms:8.0f}" if ms is not None else "       -"
+
+
+async def login(client, access_code):
+    response = await client.post("/auth/login", json={"password": access_code})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def call(client, endpoint, n, unique):
+    """
+    One request; returns (status, seconds to first token or None, total seconds)
+
+    unique adds a counter to the query so the answer cache is not hit.
+    """
+    query = QUERIES[n % len(QUERIES)] + (f" ({RUN_TAG}-{n})" if unique else "")
+    started = time.perf_counter()
+    if endpoint == "chat":
+        response = await client.post("/chat/", json={"message": query})
+        return response.status_code, None, time.perf_counter() - started
+    if endpoint == "search_ai":
+        response = await client.post("/search/ai", json={"query": query})
+        return response.status_code, None, time.perf_counter() - started
+
+    first = None
+    async with client.stream("POST", "/chat/stream", json={"message": query}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response.status_code, None, time.perf_counter() - started
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: ") and event == "delta" and first is None:
+                first = time.perf_counter() - started
+            elif line.startswith("data: ") and event == "error":
+                return 500, first, time.perf_counter() - started
+    return 200, first, time.perf_counter() - started
+
+
+async def run_level(client, endpoint, concurrency, requests, unique):
+    """requests calls, concurrency workers each sending the next one as soon as theirs completes"""
+    counter = iter(range(requests))
+
+    async def worker():
+        results = []
+        for _ in counter:
+            n = next(_request_numbers)
+            try:
+                results.append(await call(client, endpoint, n, unique))
+            except httpx.HTTPError:
+                results.append((0, None, 0.0))
+        return results
+
+    started = time.perf_counter()
+    batches = await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return [result for batch in batches for result in batch], elapsed
+
+
+def summarize(results, elapsed):
+    ok = [r for r in results if r[0] == 200]
+    rejected = sum(1 for r in results if r[0] in (429, 503))
+    latencies = [r[2] for r in ok]
+    ttfts = [r[1] for r in ok if r[1] is not None]
+    return {
+        "ok": len(ok),
+        "rejected": rejected,
+        "errors": len(results) - len(ok) - rejected,
+        "throughput": len(ok) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 0.5),
+        "p99_ms": percentile(latencies, 0.99),
+        "ttft_p50_ms": percentile(ttfts, 0.5),
+        "ttft_p99_ms": percentile(ttfts, 0.99),
+    }
+
+
+async def run(args):
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout,
+                                 limits=httpx.Limits(max_connections=max(args.concurrency) * 2)) as client:
+        token = await login(client, args.access_code)
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        report = {}
+        for endpoint in args.endpoints:
+            print("=" * 96)
+            print(f"{endpoint}: {args.requests} requests per level")
+            print("=" * 96)
+            print(f"{'concurrency':>11} {'ok':>5} {'429/503':>7} {'errors':>6} {'req/s':>8} "
+                  f"{'p50 ms':>8} {'p99 ms':>8} {'ttft p50':>8} {'ttft p99':>8}")
+            report[endpoint] = {}
+            for concurrency in args.concurrency:
+                results, elapsed = await run_level(client, endpoint, concurrency, args.requests, not args.repeat_queries)
+                stats = report[endpoint][concurrency] = summarize(results, elapsed)
+                print(f"{concurrency:>11} {stats['ok']:>5} {stats['rejected']:>7} {stats['errors']:>6} "
+                      f"{stats['throughput']:>8.2f} {fmt(stats['p50_ms'])} {fmt(stats['p99_ms'])} "
+                      f"{fmt(stats['ttft_p50_ms'])} {fmt(stats['ttft_p99_ms'])}")
+
+        health = await client.get("/health/claude")
+        if health.status_code == 200:
+            print("=" * 96)
+            print(f"Server-side Claude stats: {json.dumps(health.json().get('concurrency'))}")
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load benchmark for the AI endpoints")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="backend base URL")
+    parser.add_argument("--access-code", required=True, help="access code to log in with")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--requests", type=int, default=40, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--repeat-queries", action="store_true",
+                        help="reuse the same few queries (measures the answer cache)")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for Google Sheets date normalization
+Compares the original strptime-based parsing with app.services.date_parser
+for the three date columns converted on every sheet row
+"""
+
+import random
+import sys
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.date_parser import get_cache_stats, parse_sheet_date  # noqa: E402
+
+
+def legacy_parse_due_date(date_str):
+    """The per-call strptime parsing SheetsService used before date_parser"""
+    if not date_str or date_str.strip() == '':
+        return None
+
+    try:
+        dt = datetime.strptime(date_str, '%m/%d/%Y')
+        return dt.isoformat()
+    except ValueError:
+        try:
+            dt = datetime.strptime(date_str, '%Y-%m-%d')
+            return dt.isoformat()
+        except ValueError:
+            return date_str
+
+
+def build_rows(count):
+    """Sheet-like rows: a few hundred distinct dates repeated across rows, mixed formats"""
+    random.seed(42)
+    start = datetime(2025, 1, 1)
+    dates = [start + timedelta(days=i) for i in range(300)]
+    rows = []
+    for _ in range(count):
+        due = random.choice(dates)
+        created = random.choice(dates)
+        rows.append({
+            'Due Date': due.strftime('%m/%d/%Y'),
+            'Completed Date': random.choice(['', '', due.strftime('%Y-%m-%d')]),
+            'Created Date': f"{created.month}/{created.day}/{created.year}",
+        })
+    return rows
+
+
+def convert_rows(rows, parse):
+    for row in rows:
+        parse(str(row.get('Due Date', '')))
+        parse(str(row.get('Completed Date', '')))
+        parse(str(row.get('Created Date', '')))
+
+
+def main():
+    rows = build_rows(1000)
+
+    # Both parsers must agree before timing means anything
+    for row in rows:
+        for column in ('Due Date', 'Completed Date', 'Created Date'):
+            assert parse_sheet_date(row[column]) == legacy_parse_due_date(row[column]), row[column]
+
+    repeats = 20
+    legacy = min(timeit.repeat(lambda: convert_rows(rows, legacy_parse_due_date), number=1, repeat=repeats))
+    fast = min(timeit.repeat(lambda: convert_rows(rows, parse_sheet_date), number=1, repeat=repeats))
+
+    per_row_legacy = legacy / len(rows) * 1e6
+    per_row_fast = fast / len(rows) * 1e6
+
+    print("=" * 60)
+    print(f"Date parsing benchmark ({len(rows)} rows, 3 date columns per row)")
+    print("=" * 60)
+    print(f"strptime (legacy):  {per_row_legacy:8.2f} µs/row")
+    print(f"date_parser:        {per_row_fast:8.2f} µs/row")
+    print(f"Speedup:            {per_row_legacy / per_row_fast:8.1f}x")
+    print(f"Cache:              {get_cache_stats()}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the Anthropic Messages API
+Answers POST /v1/messages (plain and streaming) with generated text after a
+configurable delay and at a configurable token rate, so the AI endpoints can
+be load tested without paying for model calls.
+
+Usage:
+    python mock_anthropic_server.py --port 8787 --first-token-ms 400 --tokens-per-second 60
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8787 uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import sys
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORDS = (
+    "the task list for this week includes groceries, the vet appointment, "
+    "paying the insurance bill and cleaning the garage before the weekend"
+).split()
+
+app = FastAPI(title="Anthropic Messages API stand-in")
+config = argparse.Namespace()
+_message_ids = itertools.count(1)
+_cached_prefixes = set()
+
+
+def _text_of(content) -> str:
+    if isinstance(content, str):
+        return content
+    return "".join(block.get("text", "") for block in content or [] if isinstance(block, dict))
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def _usage(body: dict, output_tokens: int) -> dict:
+    """
+    Token counts for a request, imitating prompt caching: the system text up
+    to the last cache_control block is a cache write the first time it is
+    seen and a cache read afterwards
+    """
+    system = body.get("system") or []
+    if isinstance(system, str):
+        system = [{"type": "text", "text": system}]
+    breakpoint_index = max((i for i, block in enumerate(system) if block.get("cache_control")), default=-1)
+    prefix = "".join(block.get("text", "") for block in system[:breakpoint_index + 1])
+    rest = "".join(block.get("text", "") for block in system[breakpoint_index + 1:])
+    rest += "".join(_text_of(message.get("content")) for message in body.get("messages", []))
+
+    usage = {
+        "input_tokens": _estimate_tokens(rest),
+        "output_tokens": output_tokens,
+        "cache_creation_input_tokens": 0,
+        "cache_read_input_tokens": 0,
+    }
+    if prefix:
+        key = hashlib.sha256(prefix.encode("utf-8")).hexdigest()
+        field = "cache_read_input_tokens" if key in _cached_prefixes else "cache_creation_input_tokens"
+        usage[field] = _estimate_tokens(prefix)
+        _cached_prefixes.add(key)
+    return usage
+
+
+def _reply_tokens(max_tokens: int) -> list:
+    count = min(max_tokens, config.output_tokens)
+    return [("" if i == 0 else " ") + random.choice(WORDS) for i in range(count)]
+
+
+def _first_token_delay() -> float:
+    jitter = random.uniform(-config.jitter, config.jitter) if config.jitter else 0.0
+    return max(0.0, config.first_token_ms * (1 + jitter)) / 1000
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    body = await request.json()
+    tokens = _reply_tokens(body.get("max_tokens", 1024))
+    usage = _usage(body, len(tokens))
+    message = {
+        "id": f"msg_mock_{next(_message_ids):06d}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "mock"),
+        "content": [],
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {**usage, "output_tokens": 0},
+    }
+
+    if not body.get("stream"):
+        # Whole reply at once: first-token delay plus generation time
+        await asyncio.sleep(_first_token_delay() + len(tokens) / config.tokens_per_second)
+        return JSONResponse({
+            **message,
+            "content": [{"type": "text", "text": "".join(tokens)}],
+            "stop_reason": "end_turn",
+            "usage": usage,
+        })
+
+    async def events():
+        yield _sse("message_start", {"type": "message_start", "message": message})
+        yield _sse("content_block_start", {
+            "type": "content_block_start", "index": 0, "content_block": {"type": "text", "text": ""},
+        })
+        await asyncio.sleep(_first_token_delay())
+        for token in tokens:
+            yield _sse("content_block_delta", {
+                "type": "content_block_delta", "index": 0, "delta": {"type": "text_delta", "text": token},
+            })
+            await asyncio.sleep(1 / config.tokens_per_second)
+        yield _sse("content_block_stop", {"type": "content_block_stop", "index": 0})
+        yield _sse("message_delta", {
+            "type": "message_delta",
+            "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+            "usage": {"output_tokens": len(tokens)},
+        })
+        yield _sse("message_stop", {"type": "message_stop"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--first-token-ms", type=float, default=400.0, help="delay before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="generation speed after that")
+    parser.add_argument("--output-tokens", type=int, default=120, help="reply length (capped by max_tokens)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction applied to the first-token delay")
+    parser.parse_args(namespace=config)
+
+    print(f"Anthropic stand-in on http://{config.host}:{config.port} "
+          f"(first token {config.first_token_ms:.0f} ms, {config.tokens_per_second:.0f} tokens/s, "
+          f"{config.output_tokens} tokens per reply)")
+    uvicorn.run(app, host=config.host, port=config.port, log_level="warning")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
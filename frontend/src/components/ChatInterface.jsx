@@ -10,6 +10,7 @@ const ChatInterface = () => {
   const [showSuggestions, setShowSuggestions] = useState(true);
   const messagesEndRef = useRef(null);
   const isInitialLoad = useRef(true);
+  const abortRef = useRef(null);
 
   const examplePrompts = [
     "What are my high priority tasks?",
@@ -21,6 +22,8 @@ const ChatInterface = () => {
 
   useEffect(() => {
     fetchHistory();
+    // Stop a reply still streaming when the chat is closed
+    return () => abortRef.current?.abort();
   }, []);
 
   useEffect(() => {
@@ -58,22 +61,34 @@ const ChatInterface = () => {
     // Add user message immediately
     setMessages((prev) => [...prev, { role: 'user', content: messageToSend }]);
 
+    // Show the reply as it streams in
+    setMessages((prev) => [...prev, { role: 'assistant', content: '' }]);
+    const appendToReply = (text) => {
+      setMessages((prev) => {
+        const last = prev[prev.length - 1];
+        return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+      });
+    };
+
+    const controller = new AbortController();
+    abortRef.current = controller;
     try {
-      const response = await chatAPI.sendMessage(messageToSend);
-      setMessages((prev) => [...prev, { role: 'assistant', content: response.data.response }]);
+      await chatAPI.streamMessage(messageToSend, { onDelta: appendToReply, signal: controller.signal });
     } catch (error) {
+      if (error.name === 'AbortError') return;
       console.error('Error sending message:', error);
-      const errorMessage = error.response?.data?.detail ||
+      const errorMessage = error.detail ||
         'Sorry, I encountered an error connecting to Claude AI. Please check:\n\n' +
         '1. Your Anthropic API key is configured correctly\n' +
         '2. The backend server is running\n' +
         '3. You have internet connectivity\n\n' +
         'Try again or contact support if the issue persists.';
       setMessages((prev) => [
-        ...prev,
+        ...prev.slice(0, -1),
         { role: 'assistant', content: errorMessage },
       ]);
     } finally {
+      abortRef.current = null;
       setLoading(false);
     }
   };
@@ -138,7 +153,7 @@ const ChatInterface = () => {
               <p className="mt-2">Start a conversation with Claude</p>
             </div>
           ) : (
-            messages.map((message, index) => (
+            messages.filter((message) => message.content).map((message, index) => (
               <div
                 key={index}
                 className={`flex ${message.role === 'user' ? 'justify-end' : 'justify-start'}`}
@@ -155,7 +170,8 @@ const ChatInterface = () => {
               </div>
             ))
           )}
-          {loading && (
+          {/* Waiting for the first streamed token */}
+          {loading && !messages[messages.length - 1]?.content && (
             <div className="flex justify-start">
               <div className="bg-gray-100 text-gray-800 p-3 rounded-lg">
                 <div className="flex space-x-2">
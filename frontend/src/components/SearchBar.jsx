@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { Search, Sparkles } from 'lucide-react';
 import { searchAPI } from '../services/api';
 
@@ -6,6 +6,27 @@ const SearchBar = ({ onResults }) => {
   const [query, setQuery] = useState('');
   const [loading, setLoading] = useState(false);
   const [useAI, setUseAI] = useState(false);
+  const [suggestions, setSuggestions] = useState([]);
+
+  // Type-ahead suggestions (debounced so we don't hit the API on every keystroke)
+  useEffect(() => {
+    const prefix = query.trim();
+    if (prefix.length < 2) {
+      setSuggestions([]);
+      return undefined;
+    }
+
+    const timer = setTimeout(async () => {
+      try {
+        const response = await searchAPI.suggest(query);
+        setSuggestions(response.data.suggestions || []);
+      } catch (error) {
+        setSuggestions([]);
+      }
+    }, 150);
+
+    return () => clearTimeout(timer);
+  }, [query]);
 
   const handleSearch = async (e) => {
     e.preventDefault();
@@ -35,10 +56,16 @@ const SearchBar = ({ onResults }) => {
             type="text"
             value={query}
             onChange={(e) => setQuery(e.target.value)}
+            list="search-suggestions"
             placeholder="Search across tasks, calendar, reminders, knowledge base, and documents..."
             className="w-full px-4 py-3 pl-12 border border-gray-300 rounded-lg focus:outline-none focus:ring-2 focus:ring-blue-500"
           />
           <Search className="absolute left-4 top-3.5 text-gray-400" size={20} />
+          <datalist id="search-suggestions">
+            {suggestions.map((suggestion) => (
+              <option key={`${suggestion.type}-${suggestion.text}`} value={suggestion.text} />
+            ))}
+          </datalist>
         </div>
         <button
           type="button"
@@ -1,6 +1,37 @@
 import React from 'react';
 import { CheckSquare, Calendar, Bell, Book, FileText } from 'lucide-react';
 
+// Wrap the [start, end] ranges computed by the server in <mark>
+const Highlighted = ({ text, ranges }) => {
+  if (!text || !ranges || ranges.length === 0) return text || null;
+  const parts = [];
+  let pos = 0;
+  ranges.forEach(([start, end], i) => {
+    if (start < pos) return;
+    if (start > pos) parts.push(text.slice(pos, start));
+    parts.push(<mark key={i} className="bg-yellow-200 rounded-sm">{text.slice(start, end)}</mark>);
+    pos = end;
+  });
+  if (pos < text.length) parts.push(text.slice(pos));
+  return parts;
+};
+
+const Title = ({ item }) => (
+  <p className="font-medium">
+    <Highlighted text={item.title} ranges={item.highlights?.title} />
+  </p>
+);
+
+const Snippet = ({ item, fallback }) => {
+  const text = item.snippet ? item.snippet.text : fallback;
+  if (!text) return null;
+  return (
+    <p className="text-sm text-gray-600">
+      <Highlighted text={text} ranges={item.snippet?.highlights} />
+    </p>
+  );
+};
+
 const SearchResults = ({ results, isAI }) => {
   if (!results) return null;
 
@@ -13,6 +44,11 @@ const SearchResults = ({ results, isAI }) => {
         <div className="prose max-w-none">
           <p className="text-gray-700 whitespace-pre-wrap">{results.ai_analysis}</p>
         </div>
+        {results.included_records && (
+          <p className="text-xs text-gray-500 mt-4">
+            Based on {results.included_records.length} of your records most relevant to this question
+          </p>
+        )}
       </div>
     );
   }
@@ -35,8 +71,8 @@ const SearchResults = ({ results, isAI }) => {
             <div className="space-y-2 ml-6">
               {data.tasks.map((task) => (
                 <div key={task.id} className="p-2 bg-gray-50 rounded border border-gray-200">
-                  <p className="font-medium">{task.title}</p>
-                  {task.description && <p className="text-sm text-gray-600">{task.description}</p>}
+                  <Title item={task} />
+                  <Snippet item={task} fallback={task.description} />
                   <div className="flex gap-2 mt-1">
                     <span className="text-xs px-2 py-1 rounded bg-blue-100 text-blue-800">
                       {task.status}
@@ -60,8 +96,8 @@ const SearchResults = ({ results, isAI }) => {
             <div className="space-y-2 ml-6">
               {data.events.map((event) => (
                 <div key={event.id} className="p-2 bg-gray-50 rounded border border-gray-200">
-                  <p className="font-medium">{event.title}</p>
-                  {event.description && <p className="text-sm text-gray-600">{event.description}</p>}
+                  <Title item={event} />
+                  <Snippet item={event} fallback={event.description} />
                   <p className="text-xs text-gray-500 mt-1">
                     {new Date(event.start_time).toLocaleString()}
                   </p>
@@ -80,8 +116,8 @@ const SearchResults = ({ results, isAI }) => {
             <div className="space-y-2 ml-6">
               {data.reminders.map((reminder) => (
                 <div key={reminder.id} className="p-2 bg-gray-50 rounded border border-gray-200">
-                  <p className="font-medium">{reminder.title}</p>
-                  {reminder.description && <p className="text-sm text-gray-600">{reminder.description}</p>}
+                  <Title item={reminder} />
+                  <Snippet item={reminder} fallback={reminder.description} />
                   <p className="text-xs text-gray-500 mt-1">
                     {new Date(reminder.remind_at).toLocaleString()}
                   </p>
@@ -100,8 +136,8 @@ const SearchResults = ({ results, isAI }) => {
             <div className="space-y-2 ml-6">
               {data.knowledge.map((entry) => (
                 <div key={entry.id} className="p-2 bg-gray-50 rounded border border-gray-200">
-                  <p className="font-medium">{entry.title}</p>
-                  <p className="text-sm text-gray-600">{entry.content}</p>
+                  <Title item={entry} />
+                  <Snippet item={entry} fallback={entry.content} />
                   {entry.category && (
                     <span className="inline-block mt-1 text-xs px-2 py-1 rounded bg-purple-100 text-purple-800">
                       {entry.category}
@@ -122,8 +158,8 @@ const SearchResults = ({ results, isAI }) => {
             <div className="space-y-2 ml-6">
               {data.documents.map((doc) => (
                 <div key={doc.id} className="p-2 bg-gray-50 rounded border border-gray-200">
-                  <p className="font-medium">{doc.title}</p>
-                  {doc.description && <p className="text-sm text-gray-600">{doc.description}</p>}
+                  <Title item={doc} />
+                  <Snippet item={doc} fallback={doc.description} />
                   {doc.file_type && (
                     <span className="inline-block mt-1 text-xs px-2 py-1 rounded bg-red-100 text-red-800">
                       {doc.file_type}
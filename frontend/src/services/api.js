@@ -82,6 +82,7 @@ export const remindersAPI = {
 export const knowledgeAPI = {
   getAll: (category = null) => api.get('/knowledge/', { params: { category } }),
   search: (searchTerm) => api.get(`/knowledge/search/${searchTerm}`),
+  getTags: () => api.get('/knowledge/tags'),
   getById: (id) => api.get(`/knowledge/${id}`),
   create: (data) => api.post('/knowledge/', data),
   update: (id, data) => api.put(`/knowledge/${id}`, data),
@@ -92,6 +93,7 @@ export const knowledgeAPI = {
 export const documentsAPI = {
   getAll: (fileType = null) => api.get('/documents/', { params: { file_type: fileType } }),
   search: (searchTerm) => api.get(`/documents/search/${searchTerm}`),
+  getTags: () => api.get('/documents/tags'),
   getById: (id) => api.get(`/documents/${id}`),
   create: (data) => api.post('/documents/', data),
   update: (id, data) => api.put(`/documents/${id}`, data),
@@ -101,6 +103,47 @@ export const documentsAPI = {
 // Chat API
 export const chatAPI = {
   sendMessage: (message, context = null) => api.post('/chat/', { message, context }),
+  // Streams the reply over Server-Sent Events; onDelta(text) is called per chunk.
+  // Resolves with the "done" event data. Abort with signal to stop generation.
+  streamMessage: async (message, { context = null, onDelta, signal } = {}) => {
+    const response = await fetch(`${API_BASE_URL}/chat/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(activeToken ? { Authorization: `Bearer ${activeToken}` } : {}),
+      },
+      body: JSON.stringify({ message, context }),
+      signal,
+    });
+    if (!response.ok) {
+      if (response.status === 401) {
+        clearAuthToken();
+        localStorage.removeItem(AUTH_STORAGE_KEY);
+      }
+      const body = await response.json().catch(() => ({}));
+      throw Object.assign(new Error('Chat request failed'), { detail: body.detail });
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary;
+      while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+        const raw = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        const event = raw.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(raw.match(/^data: (.*)$/m)?.[1] || '{}');
+        if (event === 'delta') onDelta?.(data.text);
+        else if (event === 'error') throw Object.assign(new Error('Chat stream failed'), { detail: data.detail });
+        else if (event === 'done') return data;
+      }
+    }
+    throw new Error('Chat stream ended unexpectedly');
+  },
   getHistory: () => api.get('/chat/history'),
   clearHistory: () => api.delete('/chat/history'),
 };
@@ -108,6 +151,7 @@ export const chatAPI = {
 // Search API
 export const searchAPI = {
   search: (query, categories = null) => api.post('/search/', { query, categories }),
+  suggest: (prefix, limit = 8) => api.get('/search/suggest', { params: { prefix, limit } }),
   aiSearch: (query) => api.post('/search/ai', { query }),
 };
 